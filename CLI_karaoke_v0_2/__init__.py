@@ -11,10 +11,6 @@ Dependencies (see requirements.txt):
 colorama
 """
 
-import colorama
-
-colorama.init()
-
 try:
     from ._terminal_printer import screen_print, choice_input
     from .player import main as player_main
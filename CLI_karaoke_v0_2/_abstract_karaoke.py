@@ -3,7 +3,8 @@ Internal module that contains a universal representation of a karaoke for the pr
 It also contains functions for handling the playing of said karaoke by getting the right syllables and lines at the right time.
 """
 
-import time
+import bisect, heapq, math, time
+from collections.abc import Sequence
 
 class AbstractLine:
     def __init__(self):
@@ -12,9 +13,11 @@ class AbstractLine:
         It also contains functions for handling the playing of said karaoke by getting the right syllables and lines at the right time.
         :var self.syllables: The syllables in the line.
         :var self.times: The starting time of said syllable inside the line relative to the start of the line. The last item is the end of the last syllable.
+        :var self.singer: The singer (or voice) of the line, for duets and backing vocals. None if it's not specified.
         """
         self.syllables: list[str] = []
         self.times: list[float | int] = []
+        self.singer: str | None = None
 
     def set_syllables(self, syllables: list[str]) -> None:
         """
@@ -32,6 +35,14 @@ class AbstractLine:
         """
         self.times = times
 
+    def set_singer(self, singer: str | None) -> None:
+        """
+        Set the singer of the line, set self.singer.
+        :param singer: The new singer, or None.
+        :return: None
+        """
+        self.singer = singer
+
     def construct_line(self) -> str:
         """
         Get the line itself without any syllable or time markers.
@@ -39,33 +50,131 @@ class AbstractLine:
         """
         return "".join(self.syllables)
 
+def check_timeline(lines: Sequence[AbstractLine], times: Sequence[float | int]) -> tuple[list[int], list[float | int], float | int, int, float | int]:
+    """
+    Check the lines of a karaoke and calculate what playing them needs, in one pass over the lines (after sorting them by their start).
+    The times of every line have to be one more than its syllables, they can't start before the line (be negative) or go backwards.
+    :param lines: The lines in their order of entry.
+    :param times: The starting times of the lines.
+    :raises ValueError: If a line is invalid. The message has its number in the order of entry.
+    :return: (order, end_times, duration, max_overlap, longest_line)
+        order: the indexes of the lines sorted by their start, lines that start at the same time keep their order of entry.
+        end_times: the end of every line (in the sorted order) relative to the start of the karaoke.
+        duration: the end of the last syllable of the karaoke, 0 if there are no lines.
+        max_overlap: the most lines that are sung at the same time.
+        longest_line: the length of the longest line.
+    """
+    if len(lines) != len(times):
+        raise ValueError(f"There are {len(lines)} lines but {len(times)} line starts")
+    order = sorted(range(len(times)), key=times.__getitem__)
+    end_times = []
+    duration = 0
+    max_overlap = 0
+    longest_line = 0
+    sung_line_ends = []  # a heap
+    for entry_index in order:
+        line_start = times[entry_index]
+        line = lines[entry_index]
+        line_times = line.times
+        if not math.isfinite(line_start):
+            raise ValueError(f"Line {entry_index + 1} starts at {line_start}")
+        if len(line_times) != len(line.syllables) + 1:
+            raise ValueError(f"Line {entry_index + 1} has {len(line.syllables)} syllables but {len(line_times)} times, it should have one more time")
+        if not math.isfinite(line_times[0]):
+            raise ValueError(f"The first syllable of line {entry_index + 1} starts at {line_times[0]}")
+        if line_times[0] < 0:
+            raise ValueError(f"The first syllable of line {entry_index + 1} starts {-line_times[0]} seconds before the line")
+        for i in range(1, len(line_times)):
+            if not line_times[i - 1] <= line_times[i]:  # also catches NaN
+                raise ValueError(f"The times of line {entry_index + 1} go backwards: {line_times[i]} after {line_times[i - 1]}")
+        line_end = line_start + line_times[-1]
+        end_times.append(line_end)
+        duration = max(duration, line_end)
+        longest_line = max(longest_line, line_times[-1])
+        while sung_line_ends and sung_line_ends[0] <= line_start:
+            heapq.heappop(sung_line_ends)
+        if line_end > line_start:
+            heapq.heappush(sung_line_ends, line_end)
+            max_overlap = max(max_overlap, len(sung_line_ends))
+    return order, end_times, duration, max_overlap, longest_line
+
 class AbstractKaraoke:
     def __init__(self):
         """
         A universal representation of a karaoke.
-        :var self.lines: The lines in a karaoke.
+        Call normalize() after setting the lines and times, the parsers of the file formats do.
+        :var self.lines: The lines in a karaoke, sorted by their start (see normalize).
         :var self.times: The staring times of said lines inside the karaoke relative to the start of the karaoke.
+        :var self.end_times: The end of the last syllable of every line relative to the start of the karaoke.
+        :var self.duration: The end of the last syllable of the karaoke.
+        :var self.max_overlap: The most lines that are sung at the same time.
+        :var self.entry_indexes: The index every line had before sorting (its order of entry, like in the file).
         """
         self.lines: list[AbstractLine] = []
         self.times: list[float | int] = []
+        self.end_times: list[float | int] = []
+        self.duration: float | int = 0
+        self.max_overlap: int = 0
+        self.entry_indexes: list[int] = []
+        self._longest_line = 0
+        """The length of the longest line, lines that started longer ago than this have ended."""
         self._start_time = None
         """Start time of the clock"""
 
     def set_lines(self, lines: list[AbstractLine]) -> None:
         """
-        Set self.lines, a list of AbstractLines.
+        Set self.lines, a list of AbstractLines. Call normalize() afterwards.
         :param lines: The new AbstractLines.
         :return: None
         """
         self.lines = lines
+        self._forget_timeline()
 
     def set_times(self, times: list[float | int]) -> None:
         """
-        Set self.times, a starting time of all lines.
+        Set self.times, a starting time of all lines. Call normalize() afterwards.
         :param times: The new timings.
         :return: None
         """
         self.times = times
+        self._forget_timeline()
+
+    def _forget_timeline(self) -> None:
+        """
+        Forget what normalize() calculated, it's out of date until it's called again.
+        :return: None
+        """
+        self.end_times = []
+        self.duration = 0
+        self.max_overlap = 0
+        self.entry_indexes = []
+        self._longest_line = 0
+
+    def is_normalized(self) -> bool:
+        """
+        Check whether normalize() was called since the lines or times were set.
+        :return: True if the karaoke can be played.
+        """
+        return len(self.end_times) == len(self.lines)
+
+    def normalize(self, lines: list[AbstractLine] = None, times: list[float | int] = None) -> None:
+        """
+        Check the lines, sort them by their start (lines that start at the same time keep their order of entry)
+        and calculate self.end_times, self.duration and self.max_overlap, see check_timeline.
+        The lines and times are changed in place, so everything using them sees the change.
+        :param lines: If not None, these lines replace self.lines, in their order of entry. Nothing changes if they are invalid.
+        :param times: If not None, these starting times replace self.times.
+        :raises ValueError: If a line is invalid.
+        :return: None
+        """
+        if lines is None:
+            lines = self.lines
+        if times is None:
+            times = self.times
+        order, self.end_times, self.duration, self.max_overlap, self._longest_line = check_timeline(lines, times)
+        self.lines[:] = [lines[entry_index] for entry_index in order]
+        self.times[:] = [times[entry_index] for entry_index in order]
+        self.entry_indexes = order
 
     def get_construct_lines(self) -> list[str]:
         """
@@ -102,24 +211,172 @@ class AbstractKaraoke:
         """
         Get a line and the current syllable in it at the specified or current time.
         Get the index of a line and the currently sung syllable's index in said line at the specified or current time elapsed time.
-        If lines overlap, multiple are returned. The order is determined by their order of entry.
+        If lines overlap, multiple are returned. The order is determined by their start, then by their order of entry.
         If no syllable is said but a line is already started (like if the line supposedly starts before the singer starts singing), then None is returned in the syllable index's place.
+        Only the lines that started less than the longest line ago are looked at, found by bisecting the sorted starts (see normalize).
         :param elapsed_time: If None, the elapsed time from the start is used (call self.start()). Otherwise use this as the elapsed time.
+        :raises ValueError: If the karaoke isn't normalized, see is_normalized.
         :return: The lines and the currently said syllables in them in the format [[line_index, syllable_index], [line_index, syllable_index]...].
         """
         if elapsed_time is None:
             elapsed_time = time.perf_counter() - self._start_time
+        if not self.is_normalized():  # sorting the lines here would change the line indexes under the caller
+            raise ValueError("The karaoke isn't normalized, call normalize() after setting the lines or times")
+        line_starts = self.times
+        end_times = self.end_times
         result = []
-        for i, line in enumerate(self.lines):
-            line_time = self.times[i]
-            last_syllable_time = line.times[-1]  # current line's last syllable's end time
-            if line_time <= elapsed_time < last_syllable_time + line_time:  # if start of line <= elapsed time < end of last syllable
-                result_line_index = i
-                result_syllable_index = None
-                for j in range(len(line.syllables)):
-                    syllable_time = line.times[j]
-                    next_syllable_time = line.times[j+1]
-                    if syllable_time <= elapsed_time - line_time < next_syllable_time and result_syllable_index is None:  # if syllable start <= elapsed time since start of line < start of next syllable
-                        result_syllable_index = j
-                result.append([result_line_index, result_syllable_index])
-        return result
\ No newline at end of file
+        first_line = bisect.bisect_left(line_starts, elapsed_time - self._longest_line)
+        last_line = bisect.bisect_right(line_starts, elapsed_time)  # start of line <= elapsed time
+        for i in range(first_line, last_line):
+            if elapsed_time < end_times[i]:  # elapsed time < end of last syllable
+                line = self.lines[i]
+                # syllable start <= elapsed time since start of line < start of next syllable
+                syllable_index = bisect.bisect_right(line.times, elapsed_time - line_starts[i]) - 1
+                result.append([i, syllable_index if 0 <= syllable_index < len(line.syllables) else None])
+        return result
+
+class _TransformedTimes(Sequence):
+    __slots__ = ("_times", "_scale", "_offset")
+
+    def __init__(self, times: Sequence[float | int], scale: float | int, offset: float | int = 0):
+        """
+        A read-only view of times that applies t' = scale * t + offset when a time is read. Nothing is copied.
+        :param times: The original times.
+        :param scale: The scale (a).
+        :param offset: The offset (b).
+        """
+        self._times = times
+        self._scale = scale
+        self._offset = offset
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [time * self._scale + self._offset for time in self._times[index]]
+        return self._times[index] * self._scale + self._offset
+
+    def __iter__(self):
+        scale = self._scale
+        offset = self._offset
+        for time in self._times:
+            yield time * scale + offset
+
+class TransformedLine:
+    __slots__ = ("line", "times")
+
+    def __init__(self, line: AbstractLine, scale: float | int):
+        """
+        A read-only view of an AbstractLine with its times scaled. (The times are relative to the start of the line, so there is no offset.)
+        :param line: The original line.
+        :param scale: The scale of the times.
+        """
+        self.line = line
+        self.times = _TransformedTimes(line.times, scale)
+
+    @property
+    def syllables(self) -> list[str]:
+        return self.line.syllables
+
+    @property
+    def singer(self) -> str | None:
+        return self.line.singer
+
+    def construct_line(self) -> str:
+        return self.line.construct_line()
+
+class _TransformedLines(Sequence):
+    __slots__ = ("_lines", "_scale")
+
+    def __init__(self, lines: list[AbstractLine], scale: float | int):
+        self._lines = lines
+        self._scale = scale
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [TransformedLine(line, self._scale) for line in self._lines[index]]
+        return TransformedLine(self._lines[index], self._scale)
+
+class TimeTransformedKaraoke(AbstractKaraoke):
+    def __init__(self, karaoke: AbstractKaraoke, scale: float | int = 1, offset: float | int = 0):
+        """
+        A read-only view of a karaoke with all of its times transformed: t' = scale * t + offset.
+        Nothing is copied, the times are transformed when they are read (or the other way around for queries),
+        so any number of views can share one karaoke, and making one costs nothing. Changes of the karaoke (like a reload) are seen by the views.
+        Every view has its own clock.
+        :param karaoke: The original karaoke. If it's a view too, the transformations are combined into one.
+        :param scale: The scale (a). 1 / speed, so 1.25 means playing at 80% speed.
+        :param offset: The offset (b) in seconds. Positive values make everything later, like for a delay of the audio.
+        """
+        if isinstance(karaoke, TimeTransformedKaraoke):
+            scale, offset = karaoke.scale * scale, karaoke.offset * scale + offset
+            karaoke = karaoke.karaoke
+        self.karaoke = karaoke
+        self.scale = scale
+        self.offset = offset
+        self._start_time = None
+        """Start time of the clock"""
+
+    @classmethod
+    def from_speed(cls, karaoke: AbstractKaraoke, speed: float | int = 1, offset: float | int = 0) -> "TimeTransformedKaraoke":
+        """
+        Make a view for playing a karaoke at a different speed (tempo) and with an offset.
+        :param karaoke: The original karaoke.
+        :param speed: The speed, like 0.75 for 75% tempo.
+        :param offset: The offset in seconds, see __init__.
+        :return: The view.
+        """
+        return cls(karaoke, 1 / speed, offset)
+
+    @property
+    def lines(self) -> _TransformedLines:
+        return _TransformedLines(self.karaoke.lines, self.scale)
+
+    @property
+    def times(self) -> _TransformedTimes:
+        return _TransformedTimes(self.karaoke.times, self.scale, self.offset)
+
+    @property
+    def end_times(self) -> _TransformedTimes:
+        return _TransformedTimes(self.karaoke.end_times, self.scale, self.offset)
+
+    @property
+    def duration(self) -> float | int:
+        return self.karaoke.duration * self.scale + self.offset
+
+    @property
+    def max_overlap(self) -> int:
+        return self.karaoke.max_overlap
+
+    @property
+    def entry_indexes(self) -> list[int]:
+        return self.karaoke.entry_indexes
+
+    def normalize(self, lines: list[AbstractLine] = None, times: list[float | int] = None) -> None:
+        if lines is not None or times is not None:
+            raise TypeError("A TimeTransformedKaraoke is read-only, change the original karaoke instead")
+        self.karaoke.normalize()
+
+    def set_lines(self, lines: list[AbstractLine]) -> None:
+        raise TypeError("A TimeTransformedKaraoke is read-only, change the original karaoke instead")
+
+    def set_times(self, times: list[float | int]) -> None:
+        raise TypeError("A TimeTransformedKaraoke is read-only, change the original karaoke instead")
+
+    def get_construct_lines(self) -> list[str]:
+        return self.karaoke.get_construct_lines()
+
+    def get_current_lines_syllables_indexes(self, elapsed_time: float | int = None) -> list[list[int, int | None], ...]:
+        """
+        See AbstractKaraoke.get_current_lines_syllables_indexes. The elapsed time is transformed back to the time of the original karaoke,
+        so the original karaoke answers the query.
+        :param elapsed_time: If None, the elapsed time from the start of this view's clock is used.
+        :return: The lines and the currently said syllables in them in the format [[line_index, syllable_index], [line_index, syllable_index]...].
+        """
+        if elapsed_time is None:
+            elapsed_time = time.perf_counter() - self._start_time
+        return self.karaoke.get_current_lines_syllables_indexes((elapsed_time - self.offset) / self.scale)
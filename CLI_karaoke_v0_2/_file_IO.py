@@ -2,7 +2,9 @@
 Internal module that reads and writes a karaoke file in (multiple/one?) file formats and can create an AbstractKaraoke class.
 """
 
-import json
+import bz2, gzip, io, itertools, json, lzma, os, re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator, TextIO
 
 try:
     from ._abstract_karaoke import AbstractKaraoke, AbstractLine
@@ -13,12 +15,109 @@ except ImportError as e:
     if e.msg == "attempted relative import with no known parent package":
         screen_print_add_error(f"ImportError: {e}; just ignore this")
 
+COMPRESSIONS = {
+    "gzip": (b"\x1f\x8b", ".gz", gzip.open),
+    "bz2": (b"BZh", ".bz2", bz2.open),
+    "xz": (b"\xfd7zXZ\x00", ".xz", lzma.open),
+}
+"""Supported compressions: name -> (magic bytes at the start of the file, file extension, function that opens the file)."""
+
+def detect_compression(file: str) -> str | None:
+    """
+    Detect the compression of a file from its first bytes (not from its extension).
+    :param file: The path of the file.
+    :return: The name of the compression (a key of COMPRESSIONS), or None if the file isn't compressed (or compressed in an unsupported way).
+    """
+    with open(file, "rb") as reader:
+        head = reader.read(6)
+    for name, (magic, _, _) in COMPRESSIONS.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+def strip_compression_extension(file: str) -> str:
+    """
+    Remove the compression extension (like .gz) from the end of a path, so the real file extension can be checked.
+    :param file: The path, like "song.json.gz".
+    :return: The path without the compression extension, like "song.json".
+    """
+    for _, extension, _ in COMPRESSIONS.values():
+        if file.endswith(extension):
+            return file[:-len(extension)]
+    return file
+
+def open_karaoke_file(file: str) -> TextIO:
+    """
+    Open a karaoke file for reading text. Compressed files (see COMPRESSIONS) are decompressed while reading,
+    without writing a decompressed copy anywhere.
+    :param file: The path of the file.
+    :return: A text stream. Close it after use (or use it in a with statement).
+    """
+    compression = detect_compression(file)
+    if compression is None:
+        return open(file, "r", encoding="utf-8-sig")
+    return io.TextIOWrapper(COMPRESSIONS[compression][2](file, "rb"), encoding="utf-8-sig")
+
+FILE_FORMATS: dict[str, type["_FileFormatParser"]] = {}
+"""Supported file formats: name -> parser class. The formats are sniffed in this order, see detect_file_format."""
+
+def register_file_format(parser_class: type["_FileFormatParser"]) -> type["_FileFormatParser"]:
+    """
+    Add a parser to FILE_FORMATS. Use it as a class decorator.
+    :param parser_class: The parser class, with name, extensions and sniff set.
+    :return: The same parser class.
+    """
+    FILE_FORMATS[parser_class.name] = parser_class
+    return parser_class
+
+_METADATA_KEYS = ("title", "author", "album", "instruments", "singer", "features", "karaoke_lyrics")
+"""Metadata that is None if the file doesn't have it."""
+
 class _FileFormatParser:
+    name: str = None
+    """The name of the file format in FILE_FORMATS."""
+    extensions: tuple[str, ...] = ()
+    """The usual file extensions, only used to find karaoke files in folders. The format of a file is detected from its content."""
+
+    def __init__(self, file: str):
+        """
+        Base class of the parsers of the file formats. Subclasses set self.file, self.metadata and self.karaoke (an AbstractKaraoke).
+        :param file: The path of the file.
+        """
+        self.file = file
+        self.metadata = {}
+        self.karaoke = AbstractKaraoke()
+
+    @classmethod
+    def sniff(cls, head: str) -> bool:
+        """
+        Decide from the start of a file if it's in this file format.
+        :param head: The first characters of the file (decompressed and decoded).
+        :return: Whether the file is in this format.
+        """
+        return False
 
     def get_abstract(self):
         return self.karaoke
 
+    def reload(self) -> list[int | None]:
+        """
+        Read the file again and patch the changes into self.metadata and self.karaoke in place, so everything using them sees them.
+        The clock of the karaoke is not reset. This parses the whole file again, subclasses may do it more efficiently.
+        :return: For every line in the new self.karaoke, the index it had before, or None if it's a new or changed line.
+        """
+        new = type(self)(self.file)
+        self.metadata.clear()
+        self.metadata.update(new.metadata)
+        self.karaoke.normalize(new.karaoke.lines, new.karaoke.times)
+        self.karaoke.entry_indexes = new.karaoke.entry_indexes
+        return [None] * len(self.karaoke.lines)
+
+@register_file_format
 class ProprietaryJSON(_FileFormatParser):
+    name = "json"
+    extensions = (".json",)
+
     def __init__(self, file: str):
         """
         Proprietary JSON file format for karaoke.
@@ -41,33 +140,521 @@ class ProprietaryJSON(_FileFormatParser):
             "syllables": ["En", "ter ", "your ", "ly", "rics ", "here!"],
             "line_start": 10,
             "start_times": [0, 0.2, 0.4, 0.6, 0.8, 0.9, 1.05],
-            "end_time": 1.2
+            "end_time": 1.2,
+            "singer": "Singer name"  # optional, for duets and backing vocals, every singer gets their own lane in the player
         }, etc.
     ]
 }
 
         Support for markdown or HTML depends on the software, not the file format.
+        The file may be compressed with gzip, bz2 or xz, see COMPRESSIONS.
         """
-        with open(file, "r", encoding="utf-8") as reader:
-            raw = reader.read()
-        data = json.loads(raw)
-        for empty_key in ("title", "author", "album", "instruments", "singer", "features", "karaoke_lyrics"):
-            if empty_key not in data["metadata"].keys():
-                data["metadata"][empty_key] = None
-        self.data = data
+        self.file = file
+        self.data = self._read(file)
         self.metadata = self.data["metadata"]
         self.karaoke = self._parse_karaoke(self.data["karaoke"])
 
+    @classmethod
+    def sniff(cls, head: str) -> bool:
+        return head.lstrip().startswith("{")
+
+    @staticmethod
+    def _read(file: str) -> dict:
+        with open_karaoke_file(file) as reader:
+            data = json.load(reader)
+        for empty_key in _METADATA_KEYS:
+            if empty_key not in data["metadata"].keys():
+                data["metadata"][empty_key] = None
+        return data
+
+    def _parse_line(self, line: dict) -> AbstractLine:
+        abstract_line = AbstractLine()
+        abstract_line.set_syllables(line["syllables"])
+        abstract_line.set_times(line["start_times"] + [line["end_time"]])
+        abstract_line.set_singer(line.get("singer"))
+        return abstract_line
+
     def _parse_karaoke(self, karaoke) -> AbstractKaraoke:
         abstract_karaoke = AbstractKaraoke()
         abstract_lines = []
         line_starts = []
         for line in karaoke:
-            abstract_line = AbstractLine()
-            abstract_line.set_syllables(line["syllables"])
-            abstract_line.set_times(line["start_times"] + [line["end_time"]])
-            abstract_lines.append(abstract_line)
+            abstract_lines.append(self._parse_line(line))
             line_starts.append(line["line_start"])
-        abstract_karaoke.set_lines(abstract_lines)
-        abstract_karaoke.set_times(line_starts)
-        return abstract_karaoke
\ No newline at end of file
+        abstract_karaoke.normalize(abstract_lines, line_starts)  # the entries don't have to be in order in the file
+        return abstract_karaoke
+
+    def reload(self) -> list[int | None]:
+        """
+        Read the file again and patch the changes into self.karaoke in place, so everything using it (like a playing Player) sees them.
+        Only the karaoke entries that changed are parsed again, the AbstractLines of the others are kept. The clock of the karaoke is not reset.
+        If the file can't be read or parsed (like when it's saved halfway) or a line is invalid, an exception is raised and nothing changes.
+        :return: For every line in the new self.karaoke, the index it had before, or None if it's a new or changed line.
+        """
+        data = self._read(self.file)
+        old_entries = self.data["karaoke"]
+        old_line_indexes = [None] * len(old_entries)  # the entries were sorted into lines by their start
+        for line_index, entry_index in enumerate(self.karaoke.entry_indexes):
+            old_line_indexes[entry_index] = line_index
+        old_indexes_by_content = None
+        lines = []
+        line_starts = []
+        previous_indexes = []
+        for index, entry in enumerate(data["karaoke"]):
+            previous_entry_index = None
+            if index < len(old_entries) and entry == old_entries[index]:  # most entries don't move
+                previous_entry_index = index
+            else:
+                if old_indexes_by_content is None:  # only needed if lines were added, removed or moved
+                    old_indexes_by_content = {}
+                    for old_index, old_entry in enumerate(old_entries):
+                        old_indexes_by_content.setdefault(json.dumps(old_entry, sort_keys=True), old_index)
+                previous_entry_index = old_indexes_by_content.get(json.dumps(entry, sort_keys=True))
+            previous_index = None if previous_entry_index is None else old_line_indexes[previous_entry_index]
+            if previous_index is None:
+                lines.append(self._parse_line(entry))
+            else:
+                lines.append(self.karaoke.lines[previous_index])  # identical entries share the line, it's never changed
+            line_starts.append(entry["line_start"])
+            previous_indexes.append(previous_index)
+        self.karaoke.normalize(lines, line_starts)
+        self.data = data
+        self.metadata.clear()
+        self.metadata.update(data["metadata"])
+        data["metadata"] = self.metadata
+        return [previous_indexes[entry_index] for entry_index in self.karaoke.entry_indexes]
+
+def _parse_lrc_time(minutes: str, seconds: str) -> float:
+    return int(minutes) * 60 + float(seconds)
+
+_LRC_TAG = re.compile(r"\[([A-Za-z]+):([^\]]*)\]")
+_LRC_TIME = re.compile(r"\[(\d+):(\d+(?:[.:]\d+)?)\]")
+_LRC_WORD_TIME = re.compile(r"<(\d+):(\d+(?:\.\d+)?)>")
+
+@register_file_format
+class LRC(_FileFormatParser):
+    name = "lrc"
+    extensions = (".lrc",)
+    LAST_LINE_LENGTH = 5
+    """The length of a line in seconds if the file doesn't say when it ends (like the last line of a simple LRC file)."""
+
+    def __init__(self, file: str):
+        """
+        The LRC format, simple or enhanced (A2, with <mm:ss.xx> times for words or syllables).
+        How it's built up:
+
+[ti:Song title]
+[ar:Author]
+[00:10.00]Simple line, only the start is timed
+[00:12.00]<00:12.00>En<00:12.20>ter <00:12.40>your <00:12.60>ly<00:12.80>rics <00:12.90>here!<00:13.20>
+[00:14.00][01:14.00]A line that is repeated at two times (the <mm:ss.xx> times of a repeated line are for the first time)
+[00:16.00]
+
+        An empty timed line ends the line before it. Without one, a line ends when the next one starts.
+        The [offset:milliseconds] tag moves all times earlier (positive) or later (negative).
+        The file is read in a single pass, building the AbstractKaraoke directly.
+        """
+        super().__init__(file)
+        for key in _METADATA_KEYS:
+            self.metadata[key] = None
+        offset = 0
+        entries = []  # [start, syllables, relative start times, relative end time or None]
+        with open_karaoke_file(file) as reader:
+            for raw_line in reader:
+                position = 0
+                starts = []
+                while True:  # the time tags at the start of the line
+                    match = _LRC_TIME.match(raw_line, position)
+                    if match is None:
+                        break
+                    starts.append(_parse_lrc_time(match[1], match[2].replace(":", ".")))
+                    position = match.end()
+                if not starts:
+                    match = _LRC_TAG.match(raw_line.strip())
+                    if match is not None:
+                        key = {"ti": "title", "ar": "author", "al": "album", "by": "karaoke_author"}.get(match[1].lower())
+                        if key is not None:
+                            self.metadata[key] = match[2].strip()
+                        elif match[1].lower() == "offset":
+                            offset = int(match[2].strip() or 0) / 1000
+                    continue
+                text = raw_line[position:].rstrip("\r\n")
+                syllables, times, end = self._tokenize_text(text)
+                # The <mm:ss.xx> times belong to the first start, the repeats of the line are shifted with their start
+                relative_times = [0 if time is None else round(time - starts[0], 3) for time in times] if times else [0]
+                relative_end = None if end is None else round(end - starts[0], 3)
+                for start in starts:
+                    entries.append([start, syllables, relative_times, relative_end])
+        # The lines end when the next line starts, unless the end was in the file
+        entries.sort(key=lambda entry: entry[0])
+        next_starts = []  # the next later start of every entry, lines that start together don't end each other
+        next_start = None
+        for i in range(len(entries) - 1, -1, -1):
+            if i + 1 < len(entries) and entries[i + 1][0] > entries[i][0]:
+                next_start = entries[i + 1][0]
+            next_starts.append(next_start)
+        next_starts.reverse()
+        lines = []
+        line_starts = []
+        for i, (start, syllables, times, end) in enumerate(entries):
+            if not syllables:  # an empty line only ends the line before it
+                continue
+            if end is None:
+                next_start = next_starts[i] if next_starts[i] is not None else start + times[-1] + self.LAST_LINE_LENGTH
+                end = max(next_start - start, times[-1])
+            line = AbstractLine()
+            line.set_syllables(syllables)
+            line.set_times(times + [end])
+            lines.append(line)
+            line_starts.append(start - offset)
+        self.karaoke.normalize(lines, line_starts)
+
+    @staticmethod
+    def _tokenize_text(text: str) -> tuple[list[str], list[float], float | None]:
+        """
+        Split the text of a line at the <mm:ss.xx> times.
+        :param text: The text after the [mm:ss.xx] times.
+        :return: (syllables, absolute start times of the syllables (empty if there are none), absolute end time or None)
+            The start time of text before the first time is None, it starts with the line.
+        """
+        syllables = []
+        times = []
+        end = None
+        position = 0
+        for match in _LRC_WORD_TIME.finditer(text):
+            if match.start() > position:
+                if not times:  # text before the first time starts with the line
+                    syllables.append(text[position:match.start()])
+                    times.append(None)
+                else:
+                    syllables[-1] += text[position:match.start()]
+            syllables.append("")
+            times.append(_parse_lrc_time(match[1], match[2]))
+            position = match.end()
+        if not times:
+            return ([text.strip()] if text.strip() else []), [], None
+        syllables[-1] += text[position:]
+        if syllables[-1] == "":  # the last time is the end of the last syllable
+            syllables.pop()
+            end = times.pop()
+        return syllables, times, end
+
+    @classmethod
+    def sniff(cls, head: str) -> bool:
+        for line in head.lstrip().splitlines()[:5]:
+            if _LRC_TIME.match(line) or _LRC_TAG.match(line):
+                return True
+        return False
+
+_ASS_KARAOKE_TAG = re.compile(r"\\(?:k[fo]?|K)(\d+)")
+_ASS_TEXT = re.compile(r"\{([^}]*)\}|([^{]+)")
+
+@register_file_format
+class ASS(_FileFormatParser):
+    name = "ass"
+    extensions = (".ass", ".ssa")
+
+    def __init__(self, file: str):
+        """
+        The ASS (and SSA) subtitle format with karaoke tags (\\k, \\kf, \\ko or \\K, the length of a syllable in centiseconds).
+        Every Dialogue line of the [Events] section is a line of the karaoke. Lines without karaoke tags are a single syllable.
+        Other override tags ({\\b1} etc.) are ignored. The title comes from the Title in [Script Info].
+        The Name (actor) of a Dialogue is the singer of the line.
+        The file is read in a single pass, building the AbstractKaraoke directly.
+        """
+        super().__init__(file)
+        for key in _METADATA_KEYS:
+            self.metadata[key] = None
+        lines = []
+        line_starts = []
+        section = None
+        fields = ["Layer", "Start", "End", "Style", "Name", "MarginL", "MarginR", "MarginV", "Effect", "Text"]
+        with open_karaoke_file(file) as reader:
+            for raw_line in reader:
+                stripped_line = raw_line.strip()
+                if stripped_line.startswith("[") and stripped_line.endswith("]"):
+                    section = stripped_line.lower()
+                    continue
+                key, _, value = raw_line.rstrip("\r\n").partition(":")  # the spaces at the end of the text are part of the last syllable
+                if section == "[script info]" and key == "Title":
+                    self.metadata["title"] = value.strip()
+                elif section == "[events]" and key == "Format":
+                    fields = [field.strip() for field in value.split(",")]
+                elif section == "[events]" and key == "Dialogue":
+                    values = dict(zip(fields, value.split(",", len(fields) - 1)))
+                    start = self._parse_time(values["Start"])
+                    line = self._tokenize_text(values["Text"], self._parse_time(values["End"]) - start)
+                    if line is not None:
+                        line.set_singer(values.get("Name", "").strip() or None)
+                        lines.append(line)
+                        line_starts.append(start)
+        self.karaoke.normalize(lines, line_starts)
+
+    @staticmethod
+    def _parse_time(text: str) -> float:
+        hours, minutes, seconds = text.strip().split(":")
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    @staticmethod
+    def _tokenize_text(text: str, length: float) -> AbstractLine | None:
+        """
+        Make a line from the text of a Dialogue.
+        :param text: The text with the override tags.
+        :param length: The time between the start and the end of the Dialogue.
+        :return: The line, or None if it has no text.
+        """
+        syllables = []
+        times = []
+        time = 0
+        for match in _ASS_TEXT.finditer(text):
+            if match[1] is not None:  # an override block
+                for duration in _ASS_KARAOKE_TAG.findall(match[1]):
+                    syllables.append("")
+                    times.append(time)
+                    time += int(duration) / 100
+            else:
+                if not syllables:
+                    syllables.append("")
+                    times.append(0)
+                syllables[-1] += match[2].replace("\\N", " ").replace("\\n", " ").replace("\\h", " ")
+        # empty syllables (pauses) are dropped, the next syllable starts at its own time anyway
+        kept = [i for i, syllable in enumerate(syllables) if syllable]
+        if not kept:
+            return None
+        line = AbstractLine()
+        line.set_syllables([syllables[i] for i in kept])
+        line.set_times([times[i] for i in kept] + [time if time > 0 else length])
+        return line
+
+    @classmethod
+    def sniff(cls, head: str) -> bool:
+        return head.lstrip().lower().startswith("[script info]")
+
+def detect_file_format(file: str) -> type[_FileFormatParser]:
+    """
+    Detect the file format of a karaoke file from its first characters (see _FileFormatParser.sniff), not from its extension.
+    :param file: The path of the file. It may be compressed, see COMPRESSIONS.
+    :return: The parser class of the file format.
+    """
+    with open_karaoke_file(file) as reader:
+        head = reader.read(512)
+    for parser_class in FILE_FORMATS.values():
+        if parser_class.sniff(head):
+            return parser_class
+    raise ValueError(f"{file} is not in a supported karaoke file format")
+
+def parse_karaoke_file(file: str) -> _FileFormatParser:
+    """
+    Parse a karaoke file in any supported file format (see FILE_FORMATS).
+    :param file: The path of the file. It may be compressed, see COMPRESSIONS.
+    :return: The parser, with the karaoke in .karaoke and the metadata in .metadata.
+    """
+    return detect_file_format(file)(file)
+
+def is_karaoke_file(file: str) -> bool:
+    """
+    Check if a file has the extension of a supported karaoke file format. (Optionally followed by a compression extension.)
+    Used to find karaoke files in folders, parse_karaoke_file doesn't care about the extension.
+    :param file: The path of the file.
+    :return: Whether the file looks like a supported karaoke file.
+    """
+    file = strip_compression_extension(file).lower()
+    return any(file.endswith(parser_class.extensions) for parser_class in FILE_FORMATS.values())
+
+def _format_lrc_time(seconds: float | int) -> str:
+    """mm:ss.xx"""
+    centiseconds = max(0, round(seconds * 100))
+    return f"{centiseconds // 6000:02d}:{centiseconds // 100 % 60:02d}.{centiseconds % 100:02d}"
+
+def _format_srt_time(seconds: float | int) -> str:
+    """HH:MM:SS,mmm"""
+    milliseconds = max(0, round(seconds * 1000))
+    return f"{milliseconds // 3600000:02d}:{milliseconds // 60000 % 60:02d}:{milliseconds // 1000 % 60:02d},{milliseconds % 1000:03d}"
+
+def _format_ass_time(seconds: float | int) -> str:
+    """H:MM:SS.cc"""
+    centiseconds = max(0, round(seconds * 100))
+    return f"{centiseconds // 360000}:{centiseconds // 6000 % 60:02d}:{centiseconds // 100 % 60:02d}.{centiseconds % 100:02d}"
+
+def _lines_by_start(karaoke: AbstractKaraoke) -> list[int]:
+    """The indexes of the lines ordered by their start times (lines starting at the same time stay in their order of entry)."""
+    return sorted(range(len(karaoke.lines)), key=karaoke.times.__getitem__)
+
+def _lrc_tags(metadata: dict | None) -> Iterator[str]:
+    if metadata is None:
+        return
+    for tag, key in (("ti", "title"), ("ar", "author"), ("al", "album"), ("by", "karaoke_author")):
+        if metadata.get(key):
+            yield f"[{tag}:{metadata[key]}]\n"
+
+def export_lrc(karaoke: AbstractKaraoke, metadata: dict = None) -> Iterator[str]:
+    """
+    Export a karaoke to the LRC format, line by line. Only the start of the lines is timed.
+    An empty timed line is added where there is a pause after a line, so players don't show the line during the pause.
+    :param karaoke: The karaoke.
+    :param metadata: The metadata (like ProprietaryJSON.metadata) for the ID tags. Optional.
+    :return: A generator of the lines of the file (with line breaks).
+    """
+    yield from _lrc_tags(metadata)
+    order = _lines_by_start(karaoke)
+    for position, line_index in enumerate(order):
+        line_start = karaoke.times[line_index]
+        line = karaoke.lines[line_index]
+        yield f"[{_format_lrc_time(line_start)}]{line.construct_line().strip()}\n"
+        line_end = line_start + line.times[-1]
+        if position + 1 == len(order) or karaoke.times[order[position + 1]] > line_end:
+            yield f"[{_format_lrc_time(line_end)}]\n"
+
+def export_enhanced_lrc(karaoke: AbstractKaraoke, metadata: dict = None) -> Iterator[str]:
+    """
+    Export a karaoke to the enhanced (A2) LRC format, line by line. Every syllable gets its start time as a <mm:ss.xx> tag,
+    and the end of the last syllable gets one too.
+    :param karaoke: The karaoke.
+    :param metadata: The metadata (like ProprietaryJSON.metadata) for the ID tags. Optional.
+    :return: A generator of the lines of the file (with line breaks).
+    """
+    yield from _lrc_tags(metadata)
+    for line_index in _lines_by_start(karaoke):
+        line_start = karaoke.times[line_index]
+        line = karaoke.lines[line_index]
+        parts = [f"[{_format_lrc_time(line_start)}]"]
+        for syllable, syllable_time in zip(line.syllables, line.times):
+            parts.append(f"<{_format_lrc_time(line_start + syllable_time)}>{syllable}")
+        parts.append(f"<{_format_lrc_time(line_start + line.times[-1])}>\n")
+        yield "".join(parts)
+
+def export_srt(karaoke: AbstractKaraoke, metadata: dict = None) -> Iterator[str]:
+    """
+    Export a karaoke to the SRT subtitle format, line by line. Every line of the karaoke is a subtitle from its start to the end of its last syllable.
+    :param karaoke: The karaoke.
+    :param metadata: Not used, SRT has no metadata. It's here so all exporters can be called the same way.
+    :return: A generator of the lines of the file (with line breaks).
+    """
+    for number, line_index in enumerate(_lines_by_start(karaoke), 1):
+        line_start = karaoke.times[line_index]
+        line = karaoke.lines[line_index]
+        yield f"{number}\n"
+        yield f"{_format_srt_time(line_start)} --> {_format_srt_time(line_start + line.times[-1])}\n"
+        yield f"{line.construct_line().strip()}\n"
+        yield "\n"
+
+def export_ass(karaoke: AbstractKaraoke, metadata: dict = None) -> Iterator[str]:
+    """
+    Export a karaoke to the ASS subtitle format with \\k karaoke tags, line by line.
+    Every syllable gets a \\k tag with its length in centiseconds. A pause before the first syllable is an empty \\k tag.
+    The singer of a line is the Name (actor) of its Dialogue.
+    :param karaoke: The karaoke.
+    :param metadata: The metadata (like ProprietaryJSON.metadata) for the title. Optional.
+    :return: A generator of the lines of the file (with line breaks).
+    """
+    title = metadata.get("title") if metadata else None
+    yield "[Script Info]\n"
+    yield f"Title: {title or 'Karaoke'}\n"
+    yield "ScriptType: v4.00+\n"
+    yield "\n"
+    yield "[V4+ Styles]\n"
+    yield "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n"
+    yield "Style: Default,Arial,48,&H0000FFFF,&H00FFFFFF,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,2,0,2,20,20,20,1\n"
+    yield "\n"
+    yield "[Events]\n"
+    yield "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+    for line_index in _lines_by_start(karaoke):
+        line_start = karaoke.times[line_index]
+        line = karaoke.lines[line_index]
+        # \k durations are rounded from the absolute times, so rounding errors don't add up over the line
+        centiseconds = [round(syllable_time * 100) for syllable_time in line.times]
+        parts = []
+        if centiseconds[0] > 0:
+            parts.append(f"{{\\k{centiseconds[0]}}}")
+        for i, syllable in enumerate(line.syllables):
+            parts.append(f"{{\\k{centiseconds[i + 1] - centiseconds[i]}}}{syllable.replace('{', '(').replace('}', ')')}")
+        singer = (line.singer or "").replace(",", " ")
+        yield f"Dialogue: 0,{_format_ass_time(line_start)},{_format_ass_time(line_start + line.times[-1])},Default,{singer},0,0,0,,{''.join(parts)}\n"
+
+EXPORTERS = {
+    "lrc": (".lrc", export_lrc),
+    "enhanced_lrc": (".lrc", export_enhanced_lrc),
+    "srt": (".srt", export_srt),
+    "ass": (".ass", export_ass),
+}
+"""Export formats: name -> (file extension, exporter function)."""
+
+def export_file(karaoke: AbstractKaraoke, metadata: dict, export_format: str, file: str) -> None:
+    """
+    Export a karaoke into a file. The file is written line by line, the whole output is never in memory at once.
+    :param karaoke: The karaoke.
+    :param metadata: The metadata (like ProprietaryJSON.metadata).
+    :param export_format: A key of EXPORTERS.
+    :param file: The path of the new file.
+    :return: None
+    """
+    with open(file, "w", encoding="utf-8", newline="") as writer:
+        writer.writelines(EXPORTERS[export_format][1](karaoke, metadata))
+
+def _export_library_file(path: str, export_format: str, output_path: str) -> str:
+    """Convert one file for export_library. It runs in another process. A half written file is removed if the export fails."""
+    parser = parse_karaoke_file(path)
+    try:
+        export_file(parser.karaoke, parser.metadata, export_format, output_path)
+    except BaseException:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+    return output_path
+
+def _library_output_paths(paths: list[str], export_format: str, output_folder: str) -> list[str]:
+    """
+    Name the exported files of export_library. A file gets the name of the original file with the extension of the format,
+    unless another file of the library already got that name (like song.json and song.lrc) or it's one of the originals.
+    Then the extensions of the original are added to the name (song_lrc.lrc), and a number if that's taken too.
+    :param paths: The paths of the karaoke files.
+    :param export_format: A key of EXPORTERS.
+    :param output_folder: The folder of the exported files.
+    :return: The path of the exported file of every karaoke file.
+    """
+    extension = EXPORTERS[export_format][0]
+    taken = {os.path.normcase(os.path.abspath(path)) for path in paths}  # never overwrite an original
+    output_paths = []
+    for path in paths:
+        name = os.path.basename(path)
+        stem = os.path.splitext(strip_compression_extension(name))[0]
+        candidates = itertools.chain(
+            [stem, stem + "_" + name[len(stem):].lstrip(".").replace(".", "_")],
+            (f"{stem}_{number}" for number in itertools.count(2))
+        )
+        for candidate in candidates:
+            output_path = os.path.join(output_folder, candidate + extension)
+            if os.path.normcase(os.path.abspath(output_path)) not in taken:
+                break
+        taken.add(os.path.normcase(os.path.abspath(output_path)))
+        output_paths.append(output_path)
+    return output_paths
+
+def export_library(paths: list[str], export_format: str, output_folder: str, processes: int = None) -> tuple[list[str], dict[str, Exception]]:
+    """
+    Export many karaoke files at once, spread over multiple processes. A file that can't be exported doesn't stop the others.
+    :param paths: The paths of the karaoke files.
+    :param export_format: A key of EXPORTERS.
+    :param output_folder: The folder of the exported files. They get the name of the original file with the extension of the format,
+        files of the library with the same name don't overwrite each other or the originals, see _library_output_paths.
+    :param processes: The amount of processes. If None, the amount of CPUs.
+    :return: (exported, failed)
+        exported: the paths of the exported files, in the order of paths. The files that couldn't be exported are left out.
+        failed: the path of every file that couldn't be exported and the exception it caused.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    output_paths = _library_output_paths(paths, export_format, output_folder)
+    results = [None] * len(paths)
+    failed = {}
+    with ProcessPoolExecutor(processes) as executor:
+        futures = {
+            executor.submit(_export_library_file, path, export_format, output_path): index
+            for index, (path, output_path) in enumerate(zip(paths, output_paths))
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:  # unsupported, corrupt or undecodable, the other files are still exported
+                failed[paths[index]] = e
+    return [output_path for output_path in results if output_path is not None], failed
@@ -0,0 +1,98 @@
+"""
+Internal module that detects when a file changes, for example when a karaoke file is saved in a text editor.
+It uses inotify on Linux (through ctypes, no extra dependencies) and checks the file's modification time everywhere else.
+"""
+
+import ctypes, ctypes.util, os, struct, time
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_INOTIFY_EVENT = struct.Struct("iIII")
+"""struct inotify_event without the name: wd, mask, cookie, len"""
+
+def _inotify_watch(folder: str) -> int | None:
+    """
+    Start watching a folder with inotify.
+    :param folder: The folder to watch.
+    :return: A non-blocking inotify file descriptor, or None if inotify isn't available.
+    """
+    if not hasattr(os, "O_NONBLOCK"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        file_descriptor = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):  # no libc or no inotify in it
+        return None
+    if file_descriptor < 0:
+        return None
+    # Editors often save by writing a new file and renaming it over the old one, so the folder is watched, not the file.
+    if libc.inotify_add_watch(file_descriptor, os.fsencode(folder), _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE) < 0:
+        os.close(file_descriptor)
+        return None
+    return file_descriptor
+
+class FileWatcher:
+    def __init__(self, file: str, poll_interval: float = 0.25, use_inotify: bool = True):
+        """
+        Detects changes of a file. Call has_changed() regularly, it never waits.
+        :param file: The path of the file.
+        :param poll_interval: When inotify isn't used, the file is checked at most this often, in seconds.
+        :param use_inotify: Use inotify if it's available. If False, or it's not available, the modification time of the file is checked.
+        :var self.uses_inotify: Whether inotify is used.
+        """
+        self.file = os.path.abspath(file)
+        self.poll_interval = poll_interval
+        self._file_name = os.fsencode(os.path.basename(self.file))
+        self._inotify = _inotify_watch(os.path.dirname(self.file)) if use_inotify else None
+        self.uses_inotify = self._inotify is not None
+        self._last_stat = self._stat()
+        self._last_poll = time.perf_counter()
+
+    def _stat(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self.file)
+        except OSError:  # being replaced right now
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def has_changed(self) -> bool:
+        """
+        Check if the file changed since the last time this returned True (or since the watcher was made).
+        :return: Whether the file changed.
+        """
+        if self._inotify is not None:
+            return self._read_inotify_events()
+        now = time.perf_counter()
+        if now - self._last_poll < self.poll_interval:
+            return False
+        self._last_poll = now
+        stat = self._stat()
+        if stat is None or stat == self._last_stat:
+            return False
+        self._last_stat = stat
+        return True
+
+    def _read_inotify_events(self) -> bool:
+        changed = False
+        while True:
+            try:
+                events = os.read(self._inotify, 4096)
+            except BlockingIOError:  # no more events
+                return changed
+            offset = 0
+            while offset < len(events):
+                _, _, _, name_length = _INOTIFY_EVENT.unpack_from(events, offset)
+                offset += _INOTIFY_EVENT.size
+                if events[offset:offset + name_length].rstrip(b"\0") == self._file_name:
+                    changed = True
+                offset += name_length
+
+    def close(self) -> None:
+        """
+        Stop watching the file.
+        :return: None
+        """
+        if self._inotify is not None:
+            os.close(self._inotify)
+            self._inotify = None
@@ -0,0 +1,123 @@
+"""
+Internal module that handles playing multiple karaoke files after each other.
+The next songs are prepared (parsed and everything) in a background thread while the current one is playing,
+so switching to the next song is instant.
+"""
+
+import os, threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+def read_playlist(path: str, is_supported: Callable[[str], bool] = lambda name: name.endswith(".json")) -> list[str]:
+    """
+    Get the paths of the songs in a playlist.
+    :param path: Either a folder (all supported files in it, sorted by name)
+        or a text file with one path per line (relative paths are relative to the text file, empty lines and lines starting with # are skipped).
+    :param is_supported: Decides from the file name whether a file in a folder is a song.
+    :return: The paths of the songs.
+    """
+    if os.path.isdir(path):
+        return [os.path.join(path, name) for name in sorted(os.listdir(path)) if is_supported(name)]
+    result = []
+    folder = os.path.dirname(path)
+    with open(path, "r", encoding="utf-8") as reader:
+        for line in reader:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                result.append(os.path.join(folder, line))
+    return result
+
+class Playlist:
+    def __init__(self, paths: list[str], prepare: Callable[[str], Any], prefetch: int = 2, cache_size: int = 4, on_evict: Callable[[str, Any], None] = None):
+        """
+        A queue of songs that prepares the next songs in the background.
+        :param paths: The paths of the songs in order.
+        :param prepare: The function that turns a path into a prepared song (like a Player). It runs in a background thread.
+        :param prefetch: How many songs after the current one are prepared in advance.
+        :param cache_size: The maximum amount of prepared songs kept in memory. The least recently used ones are dropped first.
+            It is at least prefetch + 1, so the songs being prefetched don't push each other out.
+        :param on_evict: Called with the path and the prepared song when a prepared song is dropped (see cache_size and close),
+            to free what the song holds outside of the Playlist (like shared memory). If the song was still being prepared, it's called when it's done.
+            It isn't called if the same path was requested again meanwhile, because the new song may hold the same things.
+        """
+        self.paths = list(paths)
+        self.prepare = prepare
+        self.prefetch = prefetch
+        self.cache_size = max(cache_size, prefetch + 1)
+        self.on_evict = on_evict
+        self._prepared: OrderedDict[str, Future] = OrderedDict()
+        """LRU of prepared songs: path -> Future of the prepared song. The most recently used is at the end."""
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="karaoke_prefetch")
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def _request(self, path: str) -> Future:
+        """
+        Get the prepared song's Future from the LRU, or start preparing it in the background.
+        :param path: The path of the song.
+        :return: The Future of the prepared song.
+        """
+        dropped = []
+        with self._lock:
+            future = self._prepared.get(path)
+            if future is None:
+                future = self._executor.submit(self.prepare, path)
+                self._prepared[path] = future
+            else:
+                self._prepared.move_to_end(path)
+            while len(self._prepared) > self.cache_size:
+                dropped.append(self._prepared.popitem(last=False))
+        for dropped_path, dropped_future in dropped:  # outside of the lock, on_evict may be called right away
+            self._drop(dropped_path, dropped_future)
+        return future
+
+    def _drop(self, path: str, future: Future) -> None:
+        """
+        Cancel preparing a song dropped from the LRU, or call on_evict with it once it's prepared.
+        :param path: The path of the song.
+        :param future: The Future of the prepared song, already removed from the LRU.
+        :return: None
+        """
+        if future.cancel() or self.on_evict is None:  # cancelling only does anything if it's not being prepared yet
+            return
+
+        def evict(future: Future) -> None:
+            if future.cancelled() or future.exception() is not None:
+                return
+            with self._lock:
+                if path in self._prepared:  # requested again meanwhile
+                    return
+            self.on_evict(path, future.result())
+
+        future.add_done_callback(evict)
+
+    def get(self, index: int) -> Any:
+        """
+        Get a prepared song, and start preparing the next ones in the background.
+        If the song isn't prepared yet, wait for it.
+        :param index: The index of the song in self.paths.
+        :return: The prepared song. If preparing it raised an exception, it is raised here.
+        """
+        future = self._request(self.paths[index])
+        for next_index in range(index + 1, min(index + 1 + self.prefetch, len(self.paths))):
+            self._request(self.paths[next_index])
+        return future.result()
+
+    def __iter__(self):
+        for index in range(len(self.paths)):
+            yield self.get(index)
+
+    def close(self) -> None:
+        """
+        Stop preparing songs and free the prepared ones.
+        :return: None
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            dropped = list(self._prepared.items())
+            self._prepared.clear()
+        for path, future in dropped:
+            self._drop(path, future)
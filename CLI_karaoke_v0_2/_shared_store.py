@@ -0,0 +1,526 @@
+"""
+Internal module that shares parsed karaoke files between player processes on the same computer (like one player per booth screen).
+The first process that loads a song publishes its timings and syllables into shared memory, the others attach to it
+read-only instead of parsing and storing their own copy.
+
+Every published song is one shared memory block with this layout (native byte order, 8 byte aligned):
+    header: magic, ready flag, line count, syllable count, singer count, text size, metadata size (see _HEADER)
+    line_starts:      float64 * line count
+    syllable_offsets: int64 * (line count + 1)      line i has the syllables syllable_offsets[i] to syllable_offsets[i + 1]
+    times:            float64 * (syllable count + line count)   line i has the times from syllable_offsets[i] + i, one more than syllables
+    line_singers:     int64 * line count            the index of the singer, -1 for None
+    text_offsets:     int64 * (syllable count + singer count + 1)   the syllables and then the singers in text
+    text:             UTF-8
+    metadata:         UTF-8 JSON
+
+Which processes use a block is kept in a reference file (one process ID per line) next to a lock file in a temporary folder,
+so a crashed process is noticed (its process doesn't exist anymore) and doesn't keep the block alive forever.
+The block is removed when the last living process releases it, or by the next store that finds only dead processes using it.
+"""
+
+import hashlib, heapq, json, os, struct, tempfile, threading
+from collections.abc import Sequence
+from multiprocessing import resource_tracker, shared_memory
+
+try:
+    import fcntl
+except ImportError:  # Windows, where shared memory is freed by the system when the last process closes it
+    fcntl = None
+
+try:
+    from ._abstract_karaoke import AbstractKaraoke, AbstractLine, check_timeline
+    from ._file_IO import parse_karaoke_file
+    from ._terminal_printer import screen_print_add_error
+except ImportError as e:
+    from _abstract_karaoke import AbstractKaraoke, AbstractLine, check_timeline
+    from _file_IO import parse_karaoke_file
+    from _terminal_printer import screen_print_add_error
+    if e.msg == "attempted relative import with no known parent package":
+        screen_print_add_error(f"ImportError: {e}; just ignore this")
+
+_MAGIC = b"CKTL0001"
+_HEADER = struct.Struct("=8sIIIIQQ")
+"""magic, ready, line count, syllable count, singer count, text size, metadata size"""
+_HEADER_SIZE = (_HEADER.size + 7) // 8 * 8
+
+def _align(size: int) -> int:
+    return (size + 7) // 8 * 8
+
+def _layout(line_count: int, syllable_count: int, singer_count: int, text_size: int, metadata_size: int) -> dict[str, tuple[int, int]]:
+    """
+    Get where the parts of a block are.
+    :return: The offset and the size in bytes of every part, and the whole block as "total".
+    """
+    sizes = {
+        "line_starts": 8 * line_count,
+        "syllable_offsets": 8 * (line_count + 1),
+        "times": 8 * (syllable_count + line_count),
+        "line_singers": 8 * line_count,
+        "text_offsets": 8 * (syllable_count + singer_count + 1),
+        "text": text_size,
+        "metadata": metadata_size,
+    }
+    layout = {}
+    offset = _HEADER_SIZE
+    for name, size in sizes.items():
+        layout[name] = (offset, size)
+        offset = _align(offset + size)
+    layout["total"] = (0, max(offset, 1))
+    return layout
+
+def _untrack(block: shared_memory.SharedMemory) -> None:
+    """
+    Stop multiprocessing's resource tracker from removing a block when this process exits, the store decides when it's removed.
+    :param block: The shared memory block.
+    :return: None
+    """
+    if os.name == "posix":  # only tracked there
+        resource_tracker.unregister(block._name, "shared_memory")
+
+def _process_is_alive(process_id: int) -> bool:
+    """
+    Check whether a process exists. (A process ID can be reused by a new process, then a dead client looks alive until that one exits.)
+    :param process_id: The process ID.
+    :return: True if it exists.
+    """
+    try:
+        os.kill(process_id, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # exists, but belongs to someone else
+        return True
+    except OSError:  # on Windows, os.kill with 0 isn't a check
+        return True
+    return True
+
+class _SharedTimes(Sequence):
+    __slots__ = ("_times", "_start", "_length")
+
+    def __init__(self, times: memoryview, start: int, length: int):
+        """
+        A read-only view of some times of a SharedKaraoke. Every item is read from the shared memory when it's needed.
+        No new memoryview of the block is made (slices are copied into lists), so closing the karaoke always frees the block,
+        and the view can't be used afterwards.
+        :param times: The memoryview of the times, owned by the SharedKaraoke.
+        :param start: The index of the first time in the memoryview.
+        :param length: The amount of times.
+        """
+        self._times = times
+        self._start = start
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._times[self._start + i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("index out of range")
+        return self._times[self._start + index]
+
+class SharedLine:
+    __slots__ = ("times", "singer", "_karaoke", "_first_syllable", "_syllables")
+
+    def __init__(self, karaoke: "SharedKaraoke", line_index: int):
+        """
+        A read-only AbstractLine in shared memory. The times are read from the shared memory directly,
+        the syllables are decoded the first time they are needed.
+        :param karaoke: The SharedKaraoke of the line.
+        :param line_index: The index of the line.
+        """
+        first_syllable = karaoke._syllable_offsets[line_index]
+        last_syllable = karaoke._syllable_offsets[line_index + 1]
+        self.times = _SharedTimes(karaoke._times, first_syllable + line_index, last_syllable - first_syllable + 1)
+        singer_index = karaoke._line_singers[line_index]
+        self.singer = None if singer_index < 0 else karaoke._text_at(karaoke.syllable_count + singer_index)
+        self._karaoke = karaoke
+        self._first_syllable = first_syllable
+        self._syllables = None
+
+    @property
+    def syllables(self) -> list[str]:
+        if self._syllables is None:
+            first_syllable = self._first_syllable
+            self._syllables = [self._karaoke._text_at(index) for index in range(first_syllable, first_syllable + len(self.times) - 1)]
+        return self._syllables
+
+    def set_syllables(self, syllables: list[str]) -> None:
+        raise TypeError("A SharedLine is read-only")
+
+    def set_times(self, times: list[float | int]) -> None:
+        raise TypeError("A SharedLine is read-only")
+
+    def set_singer(self, singer: str | None) -> None:
+        raise TypeError("A SharedLine is read-only")
+
+    def construct_line(self) -> str:
+        return "".join(self.syllables)
+
+class SharedKaraoke(AbstractKaraoke):
+    def __init__(self, block: shared_memory.SharedMemory, key: str):
+        """
+        A read-only AbstractKaraoke in a shared memory block, see the module docstring for the layout.
+        Nothing is copied, the times are read from the shared memory when they are needed. Every SharedKaraoke has its own clock.
+        :param block: The shared memory block, published by SharedTimelineStore.
+        :param key: The key it was published with, see SharedTimelineStore.get_key. Use it to release the karaoke.
+        :var self.metadata: The metadata of the karaoke file.
+        The lines are published checked and sorted, self.end_times, self.duration and self.max_overlap are calculated from the shared times
+        when attaching (see _calculate_timeline), no syllable is decoded until it's needed.
+        """
+        self._block = block
+        self.key = key
+        buffer = block.buf.toreadonly()
+        magic, ready, line_count, syllable_count, singer_count, text_size, metadata_size = _HEADER.unpack_from(buffer)
+        if magic != _MAGIC or not ready:
+            buffer.release()
+            raise ValueError(f"The shared memory block {block.name} isn't a published karaoke")
+        self.line_count = line_count
+        self.syllable_count = syllable_count
+        layout = _layout(line_count, syllable_count, singer_count, text_size, metadata_size)
+        self._views = []
+        """All memoryviews of the block, they have to be released before the block can be closed."""
+
+        def view(name: str, format: str = None) -> memoryview:
+            offset, size = layout[name]
+            part = buffer[offset:offset + size]
+            self._views.append(part)
+            if format is not None:
+                part = part.cast(format)
+                self._views.append(part)
+            return part
+
+        self._views.append(buffer)
+        self._line_starts = view("line_starts", "d")
+        self._syllable_offsets = view("syllable_offsets", "q")
+        self._times = view("times", "d")
+        self._line_singers = view("line_singers", "q")
+        self._text_offsets = view("text_offsets", "q")
+        self._text = view("text")
+        self.metadata: dict = json.loads(bytes(view("metadata")).decode("utf-8"))
+        self._line_start_times = _SharedTimes(self._line_starts, 0, line_count)
+        self._lines = None
+        self._calculate_timeline()
+        self._start_time = None
+        """Start time of the clock"""
+
+    def _calculate_timeline(self) -> None:
+        """
+        Calculate what AbstractKaraoke.normalize would from the shared starts and times, without the line objects.
+        The lines don't have to be checked or sorted again, that was done when they were published (see _encode_karaoke).
+        :return: None
+        """
+        line_starts = self._line_starts
+        syllable_offsets = self._syllable_offsets
+        times = self._times
+        self.entry_indexes = list(range(self.line_count))
+        self.end_times = []
+        self.duration = 0
+        self.max_overlap = 0
+        self._longest_line = 0
+        sung_line_ends = []  # a heap
+        for line_index in range(self.line_count):
+            line_start = line_starts[line_index]
+            line_length = times[syllable_offsets[line_index + 1] + line_index]  # the end of the last syllable of the line
+            line_end = line_start + line_length
+            self.end_times.append(line_end)
+            self.duration = max(self.duration, line_end)
+            self._longest_line = max(self._longest_line, line_length)
+            while sung_line_ends and sung_line_ends[0] <= line_start:
+                heapq.heappop(sung_line_ends)
+            if line_end > line_start:
+                heapq.heappush(sung_line_ends, line_end)
+                self.max_overlap = max(self.max_overlap, len(sung_line_ends))
+
+    def _text_at(self, index: int) -> str:
+        return bytes(self._text[self._text_offsets[index]:self._text_offsets[index + 1]]).decode("utf-8")
+
+    @property
+    def lines(self) -> list[SharedLine]:
+        if self._lines is None:  # the small line objects are made once per process, the data stays in shared memory
+            self._lines = [SharedLine(self, line_index) for line_index in range(self.line_count)]
+        return self._lines
+
+    @property
+    def times(self) -> _SharedTimes:
+        return self._line_start_times
+
+    def set_lines(self, lines: list[AbstractLine]) -> None:
+        raise TypeError("A SharedKaraoke is read-only")
+
+    def set_times(self, times: list[float | int]) -> None:
+        raise TypeError("A SharedKaraoke is read-only")
+
+    def close(self) -> None:
+        """
+        Detach from the shared memory block. The karaoke (and its lines and times) can't be used afterwards.
+        :return: None
+        """
+        self._lines = None
+        for part in reversed(self._views):
+            part.release()
+        self._views.clear()
+        self._block.close()
+
+def _encode_karaoke(karaoke: AbstractKaraoke, metadata: dict) -> tuple[dict, tuple]:
+    """
+    Encode a karaoke into the parts of a block.
+    :raises ValueError: If a line is invalid, see check_timeline.
+    :return: The parts (name: bytes) and the header values after the magic and the ready flag.
+    """
+    order = check_timeline(karaoke.lines, karaoke.times)[0]  # the lines are published sorted by their start
+    lines = [karaoke.lines[line_index] for line_index in order]
+    singers = []
+    singer_indexes = {}
+    syllable_offsets = [0]
+    times = []
+    line_singers = []
+    texts = []
+    for line in lines:
+        texts.extend(syllable.encode("utf-8") for syllable in line.syllables)
+        syllable_offsets.append(len(texts))
+        times.extend(line.times)
+        singer = getattr(line, "singer", None)
+        if singer is None:
+            line_singers.append(-1)
+        else:
+            if singer not in singer_indexes:
+                singer_indexes[singer] = len(singers)
+                singers.append(singer)
+            line_singers.append(singer_indexes[singer])
+    syllable_count = len(texts)
+    texts.extend(singer.encode("utf-8") for singer in singers)
+    text_offsets = [0]
+    for text in texts:
+        text_offsets.append(text_offsets[-1] + len(text))
+    parts = {
+        "line_starts": struct.pack(f"={len(lines)}d", *(karaoke.times[line_index] for line_index in order)),
+        "syllable_offsets": struct.pack(f"={len(syllable_offsets)}q", *syllable_offsets),
+        "times": struct.pack(f"={len(times)}d", *times),
+        "line_singers": struct.pack(f"={len(line_singers)}q", *line_singers),
+        "text_offsets": struct.pack(f"={len(text_offsets)}q", *text_offsets),
+        "text": b"".join(texts),
+        "metadata": json.dumps(metadata, ensure_ascii=False).encode("utf-8"),
+    }
+    return parts, (len(lines), syllable_count, len(singers), len(parts["text"]), len(parts["metadata"]))
+
+class SharedTimelineStore:
+    def __init__(self, namespace: str = "CLI_karaoke", folder: str = None):
+        """
+        Publishes parsed karaoke files in shared memory once, so other processes can attach to them instead of parsing their own copy.
+        Every process makes its own store with the same namespace. Use close() (or a with statement) when the process is done.
+        Blocks of crashed processes are cleaned up when a store is made.
+        :param namespace: The stores with the same namespace share their karaoke files.
+        :param folder: The folder of the lock and reference files. If None, a folder in the temporary folder is used.
+        """
+        self.namespace = namespace
+        if folder is None:
+            user = os.getuid() if hasattr(os, "getuid") else os.environ.get("USERNAME", "")
+            folder = os.path.join(tempfile.gettempdir(), f"{namespace}_shared_{user}")
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self._attached: dict[str, SharedKaraoke] = {}
+        """The attached karaoke files by their key."""
+        self._thread_lock = threading.Lock()  # file locks don't keep the threads of one process apart
+        self.collect_garbage()
+
+    def _block_name(self, key: str) -> str:
+        # Short, macOS allows 31 characters
+        return "ckl_" + hashlib.sha1(f"{self.namespace}\0{key}".encode("utf-8")).hexdigest()[:24]
+
+    def _lock(self):
+        """
+        Lock the store for all processes.
+        :return: The opened lock file, close it to unlock.
+        """
+        lock_file = open(os.path.join(self.folder, ".lock"), "a+b")
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    def _read_references(self, name: str) -> list[int]:
+        """
+        Get the living processes that use a block. The dead ones are forgotten. The store has to be locked.
+        :param name: The name of the block.
+        :return: The process IDs.
+        """
+        try:
+            with open(os.path.join(self.folder, name + ".refs"), "r", encoding="utf-8") as reader:
+                process_ids = [int(line) for line in reader.read().split()]
+        except FileNotFoundError:
+            return []
+        return [process_id for process_id in process_ids if _process_is_alive(process_id)]
+
+    def _write_references(self, name: str, process_ids: list[int]) -> None:
+        """
+        Save the processes that use a block. If there are none, the block is removed. The store has to be locked.
+        :param name: The name of the block.
+        :param process_ids: The process IDs.
+        :return: None
+        """
+        path = os.path.join(self.folder, name + ".refs")
+        if len(process_ids) != 0:
+            with open(path, "w", encoding="utf-8") as writer:
+                writer.write("".join(f"{process_id}\n" for process_id in process_ids))
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        self._unlink(name)
+
+    def _unlink(self, name: str) -> None:
+        try:
+            block = shared_memory.SharedMemory(name)
+        except FileNotFoundError:
+            return
+        block.close()
+        block.unlink()  # unregisters it from the resource tracker too, which attaching registered it with
+
+    def _attach_block(self, name: str, key: str) -> SharedKaraoke | None:
+        """
+        Attach to a block if it's published. A block that was never finished (the publishing process crashed) is removed.
+        :param name: The name of the block.
+        :param key: The key of the karaoke in the block.
+        :return: The SharedKaraoke, or None if the block isn't published.
+        """
+        try:
+            block = shared_memory.SharedMemory(name)
+        except FileNotFoundError:
+            return None
+        _untrack(block)
+        try:
+            return SharedKaraoke(block, key)
+        except (ValueError, struct.error):
+            block.close()
+            self._write_references(name, [])
+            return None
+
+    def attach(self, key: str) -> SharedKaraoke | None:
+        """
+        Attach to a published karaoke read-only.
+        :param key: The key it was published with.
+        :return: The SharedKaraoke, or None if nothing is published with the key.
+        """
+        with self._thread_lock:
+            if key in self._attached:
+                return self._attached[key]
+            name = self._block_name(key)
+            with self._lock():
+                karaoke = self._attach_block(name, key)
+                if karaoke is not None:
+                    self._write_references(name, self._read_references(name) + [os.getpid()])
+                    self._attached[key] = karaoke
+            return karaoke
+
+    def publish(self, key: str, karaoke: AbstractKaraoke, metadata: dict) -> SharedKaraoke:
+        """
+        Publish a karaoke and attach to it. If it's already published (by another process), that one is attached to.
+        :param key: The key of the karaoke, see get_key.
+        :param karaoke: The karaoke.
+        :param metadata: The metadata of the karaoke file.
+        :return: The SharedKaraoke.
+        """
+        parts, counts = _encode_karaoke(karaoke, metadata)  # before locking, so other processes don't wait for this
+        layout = _layout(*counts)
+        with self._thread_lock:
+            if key in self._attached:
+                return self._attached[key]
+            name = self._block_name(key)
+            with self._lock():
+                shared_karaoke = self._attach_block(name, key)
+                process_ids = self._read_references(name) + [os.getpid()]
+                if shared_karaoke is None:
+                    # Referenced before it exists, so collect_garbage finds the block if this process crashes while writing it
+                    self._write_references(name, process_ids)
+                    block = None
+                    try:
+                        block = shared_memory.SharedMemory(name, create=True, size=layout["total"][1])
+                        _untrack(block)
+                        for part_name, data in parts.items():
+                            offset = layout[part_name][0]
+                            block.buf[offset:offset + len(data)] = data
+                        _HEADER.pack_into(block.buf, 0, _MAGIC, 0, *counts)
+                        _HEADER.pack_into(block.buf, 0, _MAGIC, 1, *counts)  # ready, everything else is written
+                        shared_karaoke = SharedKaraoke(block, key)
+                    except BaseException:
+                        if block is not None:
+                            block.close()
+                        self._write_references(name, process_ids[:-1])
+                        self._unlink(name)  # unfinished, even if another process references it
+                        raise
+                self._write_references(name, process_ids)
+                self._attached[key] = shared_karaoke
+            return shared_karaoke
+
+    @staticmethod
+    def get_key(path: str) -> str:
+        """
+        Get the key of a karaoke file. It changes when the file changes, so a changed file is published again.
+        :param path: The path of the karaoke file.
+        :return: The key.
+        """
+        stat = os.stat(path)
+        return f"{os.path.abspath(path)}\0{stat.st_mtime_ns}\0{stat.st_size}"
+
+    def load(self, path: str) -> SharedKaraoke:
+        """
+        Get a karaoke file from the store, or parse and publish it if no process did that yet.
+        :param path: The path of the karaoke file in any supported format, see _file_IO.parse_karaoke_file.
+        :return: The SharedKaraoke, its metadata is in its metadata attribute.
+        """
+        key = self.get_key(path)
+        karaoke = self.attach(key)
+        if karaoke is None:
+            parser = parse_karaoke_file(path)
+            karaoke = self.publish(key, parser.karaoke, parser.metadata)
+        return karaoke
+
+    def release(self, key: str) -> None:
+        """
+        Detach from a karaoke. It's removed from shared memory if no other process uses it.
+        :param key: The key of the karaoke.
+        :return: None
+        """
+        with self._thread_lock:
+            karaoke = self._attached.pop(key, None)
+            if karaoke is None:
+                return
+            karaoke.close()
+            name = self._block_name(key)
+            with self._lock():
+                process_ids = self._read_references(name)
+                if os.getpid() in process_ids:
+                    process_ids.remove(os.getpid())
+                self._write_references(name, process_ids)
+
+    def collect_garbage(self) -> int:
+        """
+        Remove the blocks that only crashed processes (or none) use.
+        :return: The amount of removed blocks.
+        """
+        removed = 0
+        with self._thread_lock, self._lock():
+            for file_name in os.listdir(self.folder):
+                if file_name.endswith(".refs"):
+                    name = file_name[:-len(".refs")]
+                    if len(self._read_references(name)) == 0:
+                        self._write_references(name, [])
+                        removed += 1
+        return removed
+
+    def close(self) -> None:
+        """
+        Release all karaoke files of this process.
+        :return: None
+        """
+        for key in list(self._attached):
+            self.release(key)
+
+    def __enter__(self) -> "SharedTimelineStore":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,190 @@
+"""
+Internal module that splits lyrics into syllables for the writer, using Liang-style hyphenation patterns (the ones TeX uses).
+The pattern files are in the _hyphenation folder. They are compiled into a trie once and the trie is cached on disk.
+"""
+
+import marshal, os, re
+
+HYPHENATION_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_hyphenation")
+"""The folder with the bundled pattern (<language>.pat.txt) and exception (<language>.hyp.txt) files."""
+
+CACHE_FOLDER = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "CLI_karaoke")
+"""The folder where compiled tries are cached."""
+
+_CACHE_VERSION = 1
+"""Increase this if the format of the cached trie changes."""
+
+_WORD_PART = re.compile(r"[^\W\d_]+")
+"""Letters only. Hyphenation points are only searched for inside these parts of a word."""
+_WORD_WITH_SPACES = re.compile(r"\s*\S+\s*")
+"""A word with the spaces after it. (And the spaces before it, if it's the first word in the line.)"""
+_APOSTROPHES = "'\u2019"
+"""The parts of a word separated only by these aren't split apart, like don't or rock'n'roll."""
+
+
+def _read_words(path: str) -> list[str]:
+    """
+    Read the whitespace separated words of a pattern or exception file. Everything after a % is a comment.
+    :param path: The path of the file.
+    :return: The words in the file.
+    """
+    words = []
+    with open(path, "r", encoding="utf-8") as reader:
+        for line in reader:
+            words.extend(line.split("%", 1)[0].split())
+    return words
+
+
+def compile_patterns(patterns: list[str]) -> dict[str, tuple[int, ...] | None]:
+    """
+    Compile hyphenation patterns (like "a1bc3d4") into a compact trie.
+    The trie is a single dict with every prefix of every pattern as a key, so walking down the trie is just looking up longer and longer slices of a word.
+    It loads a lot faster from the cache than a tree of nested dicts.
+    :param patterns: The patterns.
+    :return: The trie. A key maps to the values of the pattern, like (0, 1, 0, 3, 4) for "abcd" from "a1bc3d4",
+        or to None if the key is only the start of longer patterns.
+    """
+    trie = {}
+    for pattern in patterns:
+        letters = re.sub(r"\d", "", pattern)
+        for end in range(1, len(letters)):
+            trie.setdefault(letters[:end], None)
+        trie[letters] = tuple(int(value or 0) for value in re.split(r"\D", pattern))
+    return trie
+
+
+class Syllabifier:
+    def __init__(self, language: str = "en-us", left_min: int = 2, right_min: int = 2, use_cache: bool = True):
+        """
+        Splits words and lines into syllables with hyphenation patterns.
+        Results are memoized per word, so syllabifying the same words again (like a chorus) is free.
+        :param language: The name of the pattern files in HYPHENATION_FOLDER without the extensions.
+        :param left_min: The minimum amount of letters before the first split in a word.
+        :param right_min: The minimum amount of letters after the last split in a word.
+        :param use_cache: Load the compiled trie from CACHE_FOLDER, and save it there if it's not there yet or outdated.
+        """
+        self.language = language
+        self.left_min = left_min
+        self.right_min = right_min
+        self._trie = self._load_trie(use_cache)
+        self._exceptions = {}
+        exceptions_path = os.path.join(HYPHENATION_FOLDER, language + ".hyp.txt")
+        if os.path.exists(exceptions_path):
+            for exception in _read_words(exceptions_path):
+                self._exceptions[exception.replace("-", "")] = exception.split("-")
+        self._word_cache: dict[str, list[str]] = {}
+
+    def _load_trie(self, use_cache: bool) -> dict[str, tuple[int, ...] | None]:
+        """
+        Load the compiled trie from the cache, or compile it from the pattern file (and cache it).
+        :param use_cache: Use (and update) the cache in CACHE_FOLDER.
+        :return: The trie, see compile_patterns.
+        """
+        patterns_path = os.path.join(HYPHENATION_FOLDER, self.language + ".pat.txt")
+        patterns_stat = os.stat(patterns_path)
+        stamp = (_CACHE_VERSION, patterns_stat.st_mtime_ns, patterns_stat.st_size)
+        cache_path = os.path.join(CACHE_FOLDER, self.language + ".trie")
+        if use_cache:
+            try:
+                with open(cache_path, "rb") as reader:
+                    cached_stamp, trie = marshal.load(reader)
+                if tuple(cached_stamp) == stamp:
+                    return trie
+            except (OSError, EOFError, ValueError, TypeError):
+                pass  # no cache or an unusable one, compile it again
+        trie = compile_patterns(_read_words(patterns_path))
+        if use_cache:
+            try:
+                os.makedirs(CACHE_FOLDER, exist_ok=True)
+                temporary_path = cache_path + f".{os.getpid()}.tmp"
+                with open(temporary_path, "wb") as writer:
+                    marshal.dump((stamp, trie), writer)
+                os.replace(temporary_path, cache_path)
+            except OSError:
+                pass  # a read-only home folder is not a reason to fail, we just compile next time too
+        return trie
+
+    def syllabify_word(self, word: str) -> list[str]:
+        """
+        Split a word (letters only, no spaces or punctuation) into syllables. The case of the letters is kept.
+        :param word: The word.
+        :return: The syllables, like ["hy", "phen", "ation"] for "hyphenation".
+        """
+        syllables = self._word_cache.get(word)
+        if syllables is not None:
+            return syllables
+        lower_word = word.lower()
+        if lower_word in self._exceptions:
+            syllables = []
+            position = 0
+            for part in self._exceptions[lower_word]:
+                syllables.append(word[position:position + len(part)])
+                position += len(part)
+        else:
+            syllables = [word[start:end] for start, end in self._split_points(lower_word)]
+        self._word_cache[word] = syllables
+        return syllables
+
+    def _split_points(self, lower_word: str) -> list[tuple[int, int]]:
+        """
+        Run Liang's algorithm on a lowercase word.
+        :param lower_word: The word in lowercase.
+        :return: The (start, end) slices of the syllables in the word.
+        """
+        trie = self._trie
+        work = "." + lower_word + "."
+        values = [0] * (len(work) + 1)
+        for i in range(len(work)):
+            for end in range(i + 1, len(work) + 1):
+                part = work[i:end]
+                if part not in trie:
+                    break
+                pattern_values = trie[part]
+                if pattern_values is not None:
+                    for j, value in enumerate(pattern_values):
+                        if value > values[i + j]:
+                            values[i + j] = value
+        # values[k + 1] is the value between lower_word[k - 1] and lower_word[k], odd values mean a split
+        result = []
+        start = 0
+        for k in range(self.left_min, len(lower_word) - self.right_min + 1):
+            if values[k + 1] % 2 == 1:
+                result.append((start, k))
+                start = k
+        result.append((start, len(lower_word)))
+        return result
+
+    def syllabify_line(self, line: str) -> list[str]:
+        """
+        Split a line of lyrics into syllables the way ProprietaryJSON expects them:
+        spaces stay at the end of the last syllable of a word and punctuation stays with the closest syllable,
+        so "".join(result) == line.
+        :param line: The line, like "Enter your beautiful lyrics!".
+        :return: The syllables, like ["En", "ter ", "your ", "beau", "ti", "ful ", "lyrics!"].
+            The parts of a word are split too, like ["stop-", "be", "liev", "ing"] for "stop-believing".
+        """
+        result = []
+        for match in _WORD_WITH_SPACES.finditer(line):
+            token = match.group()
+            start = 0
+            previous_end = None
+            for word_part in _WORD_PART.finditer(token):
+                position = word_part.start()
+                if previous_end is not None and token[previous_end:position].strip(_APOSTROPHES):
+                    result.append(token[start:position])  # the punctuation between the parts stays with the part before it
+                    start = position
+                previous_end = word_part.end()
+                for syllable in self.syllabify_word(word_part.group())[:-1]:
+                    position += len(syllable)
+                    result.append(token[start:position])
+                    start = position
+            result.append(token[start:])
+        return result
+
+    def syllabify_lyrics(self, lyrics: str) -> list[list[str]]:
+        """
+        Split all the lines of some lyrics into syllables, see syllabify_line. Empty lines are skipped.
+        :param lyrics: The lyrics, lines separated by line breaks.
+        :return: The syllables of every (non-empty) line.
+        """
+        return [self.syllabify_line(line.strip()) for line in lyrics.splitlines() if line.strip()]
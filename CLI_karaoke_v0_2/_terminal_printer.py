@@ -2,11 +2,30 @@
 Internal module that handles printing to the terminal screen, including "clearing" the screen and positioning things well.
 """
 
-import os, shutil
+import os, re, shutil, sys, threading, time
+from typing import TextIO
 
 import colorama
 
-colorama.init()
+def _stdout_is_terminal() -> bool:
+    try:
+        return sys.stdout.isatty()
+    except (AttributeError, ValueError):  # replaced by something without isatty, or closed
+        return False
+
+NEEDS_COLORAMA = os.name == "nt" or not _stdout_is_terminal()
+"""colorama is needed on Windows (to convert the ANSI escape sequences) and when stdout is not a terminal (to strip them).
+POSIX terminals understand ANSI escape sequences themselves, sys.stdout is used as it is there."""
+
+def init_output() -> None:
+    """
+    Initialize the terminal output. colorama is only initialized if it's needed, see NEEDS_COLORAMA.
+    :return: None
+    """
+    if NEEDS_COLORAMA:
+        colorama.init()
+
+init_output()
 
 FALLBACK_TERMINAL_SIZE = (80, 24)
 """Fallback terminal size for shutil.get_terminal_size.
@@ -26,35 +45,61 @@ def get_terminal_size(query_terminal_size: bool = True):
     return _last_terminal_size
 
 errors = []
-def screen_print(text: str, scroll: int = 0, input_space: bool = False, query_terminal_size: bool = True, include_errors: bool = True, clear_errors: bool = True):
+
+_ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+"""ANSI escape sequences (like colors), they don't take up any space on the screen."""
+
+def cut_visible(text: str, width: int) -> str:
     """
-    Print text starting from the top left part of the screen.
-    If the text overflows horizontally, it gets cut off.
-    If the text overflows vertically, it gets cut off. But it can be "scrolled" to.
-    :param text: The text to print.
+    Cut text to the width of the screen, not counting the ANSI escape sequences (like colors). The escape sequences are kept.
+    :param text: The text, one line.
+    :param width: The amount of visible characters to keep.
+    :return: The cut text. A line break at the end is kept.
+    """
+    ending = text[len(text.rstrip("\r\n")):]
+    if len(_ANSI_ESCAPE.sub("", text)) - len(ending) <= width:  # already fits, usually because of the colors
+        return text
+    parts = []
+    remaining = width
+    position = 0
+    for match in _ANSI_ESCAPE.finditer(text):
+        plain = text[position:match.start()]
+        parts.append(plain[:remaining])
+        remaining -= min(len(plain), remaining)
+        parts.append(match.group())
+        position = match.end()
+    parts.append(text[position:len(text) - len(ending)][:remaining])
+    return "".join(parts) + ending
+
+def format_screen(text: str, scroll: int = 0, query_terminal_size: bool = True, include_errors: bool = True, clear_errors: bool = True, cut_lines: bool = True) -> str:
+    """
+    Format text to fill the screen starting from the top left part of it, without printing it. See screen_print for the details.
+    :param text: The text to format.
     :param scroll: The amount of lines to scroll down. (Or up, negative numbers are allowed)
-    :param input_space: Leave one line of space for user input. This function does not take said user input.
-    :param query_terminal_size: Get the terminal size before printing. If disabled,
-        then the previously known terminal size will be used. May be used to print in a "responsive" way.
-    :param include_errors: All saved errors will be printed to the top of all other text, regardless of the main content.
+    :param query_terminal_size: Get the terminal size before formatting. If disabled, then the previously known terminal size will be used.
+    :param include_errors: All saved errors will be added to the top of all other text, regardless of the main content.
     :param clear_errors: Clear the errors so that they won't be displayed again.
-    :return: None
+    :param cut_lines: Cut the lines of the text that are wider than the screen. Disable it if the text is already cut (the errors are cut anyway).
+    :return: The formatted text that can be printed as it is.
     """
-    terminal_size = get_terminal_size(query_terminal_size)
+    terminal_size = list(get_terminal_size(query_terminal_size))  # a copy, so the last known terminal size isn't changed
     #  terminal_size[1] -= int(input_space) + 1  # Remove 1 from the screen height regardless
     terminal_size[1] -= 1
     # FORMAT PRINTED TEXT
+    error_lines = []
     if include_errors:
         # 0. ADD ERRORS
-        text = "".join(errors) + text
+        error_lines = "".join(errors).splitlines(keepends=True)
     if clear_errors:
         # CLEAR ERRORS
         errors.clear()
     # 1. HORIZONTAL OVERFLOW CUTOFF
     text_lines = text.splitlines(keepends=True)
-    for i, line in enumerate(text_lines):
-        if len(line) > terminal_size[0]:
-            text_lines[i] = line[0:terminal_size[0]]
+    cut_lines_count = len(error_lines) + (len(text_lines) if cut_lines else 0)  # the text comes after the errors
+    text_lines = error_lines + text_lines
+    for i in range(cut_lines_count):
+        if len(text_lines[i]) > terminal_size[0]:
+            text_lines[i] = cut_visible(text_lines[i], terminal_size[0])
     printed = "".join(text_lines)
     # 1. SCROLL
     if scroll < 0:
@@ -68,12 +113,116 @@ def screen_print(text: str, scroll: int = 0, input_space: bool = False, query_te
         printed += os.linesep * (terminal_size[1] - len(printed_lines) + 1)
     elif len(printed_lines) > terminal_size[1]:
         printed = "".join(printed_lines[0:terminal_size[1]])
+    return printed
+
+def screen_print(text: str, scroll: int = 0, input_space: bool = False, query_terminal_size: bool = True, include_errors: bool = True, clear_errors: bool = True):
+    """
+    Print text starting from the top left part of the screen.
+    If the text overflows horizontally, it gets cut off.
+    If the text overflows vertically, it gets cut off. But it can be "scrolled" to.
+    :param text: The text to print.
+    :param scroll: The amount of lines to scroll down. (Or up, negative numbers are allowed)
+    :param input_space: Leave one line of space for user input. This function does not take said user input.
+    :param query_terminal_size: Get the terminal size before printing. If disabled,
+        then the previously known terminal size will be used. May be used to print in a "responsive" way.
+    :param include_errors: All saved errors will be printed to the top of all other text, regardless of the main content.
+    :param clear_errors: Clear the errors so that they won't be displayed again.
+    :return: None
+    """
     # PRINT TEXT
-    print(printed, end="")
+    print(format_screen(text, scroll, query_terminal_size, include_errors, clear_errors), end="")
+
+class FrameWriter:
+    def __init__(self, stream: TextIO = None):
+        """
+        Writes frames to the terminal in its own thread, so a slow terminal doesn't slow down whatever makes the frames.
+        Only the newest frame is written: if a new frame is submitted before the previous one got written, the previous one is dropped.
+        Use start() before and stop() after submitting frames.
+        :param stream: Where to write the frames. If None, sys.stdout is used (wrapped by colorama if it's needed, see NEEDS_COLORAMA).
+        :var self.frames_submitted: The amount of frames submitted.
+        :var self.frames_written: The amount of frames actually written.
+        :var self.frames_dropped: The amount of frames replaced by a newer frame before they got written.
+        :var self.frames_coalesced: The amount of frames not written because they were the same as the frame before them.
+        :var self.last_write_duration: The time it took to write the last written frame, in seconds.
+        """
+        self.stream = stream
+        self.frames_submitted = 0
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.frames_coalesced = 0
+        self.last_write_duration = 0.0
+        self._pending = None
+        """The newest frame that isn't written yet."""
+        self._last_frame = None
+        """The last frame that wasn't coalesced."""
+        self._running = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def start(self) -> None:
+        """
+        Start the writer thread.
+        :return: None
+        """
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="karaoke_frame_writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, frame: str) -> None:
+        """
+        Give a frame to the writer thread. This never waits for the terminal.
+        :param frame: The whole frame as it should be printed (see format_screen).
+        :return: None
+        """
+        with self._condition:
+            self.frames_submitted += 1
+            if frame == self._last_frame:
+                self.frames_coalesced += 1
+                return
+            if self._pending is not None:
+                self.frames_dropped += 1
+            self._pending = frame
+            self._last_frame = frame
+            self._condition.notify()
+
+    def _run(self) -> None:
+        stream = self.stream if self.stream is not None else sys.stdout
+        while True:
+            with self._condition:
+                while self._pending is None and self._running:
+                    self._condition.wait()
+                frame = self._pending
+                self._pending = None
+                if frame is None:  # stopped and nothing left to write
+                    return
+            write_start = time.perf_counter()
+            stream.write(frame)
+            stream.flush()
+            with self._condition:
+                self.frames_written += 1
+                self.last_write_duration = time.perf_counter() - write_start
+
+    def stop(self) -> None:
+        """
+        Write the last submitted frame (if it isn't written yet) and stop the writer thread.
+        :return: None
+        """
+        if self._thread is None:
+            return
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._thread.join()
+        self._thread = None
 
 def screen_print_add_error(full_error: str):
     errors.append(colorama.Fore.RED + f"ERROR: {full_error}" + colorama.Fore.RESET + os.linesep)
 
+def screen_clear_errors():
+    errors.clear()
+
 
 def choice_input(choices: list[str], prompt: str = None, invalid_choice_text: str = None):
     """
@@ -96,6 +245,30 @@ def choice_input(choices: list[str], prompt: str = None, invalid_choice_text: st
             choice = None
     return choice
 
+def number_input(prompt: str = "Number: ", default: float = None, invalid_number_text: str = None, minimum: float = None) -> float:
+    """
+    Get a number from the user. Asks the user until it gets a valid number.
+    :param prompt: The text to display before the user input. Default is "Number: ".
+    :param default: The number to use if nothing is entered. If None, something has to be entered.
+    :param invalid_number_text: The text to print if an invalid number is entered. Default is the inputted invalid number and a question mark (?).
+        The invalid_number_text is formatted, so you can include a {} to get the invalid number.
+    :param minimum: The smallest valid number. If None, there is no minimum.
+    :return: The number.
+    """
+    if invalid_number_text is None:
+        invalid_number_text = "{}?"
+    while True:
+        text = input(prompt).strip()
+        if text == "" and default is not None:
+            return default
+        try:
+            number = float(text)
+        except ValueError:
+            number = None
+        if number is not None and (minimum is None or number >= minimum):
+            return number
+        print(invalid_number_text.format(text))
+
 def path_input(prompt: str = "Path: ", invalid_path_text: str = None) -> str:
     """
     Get a valid path input from the user. Checked with os.path.exists.
@@ -0,0 +1,254 @@
+"""
+Benchmarks for the parts of the program where speed matters. Not needed for using the program.
+Run with: python benchmarks.py [benchmark names...] (all of them if no names are given)
+"""
+
+import json, os, random, shutil, sys, tempfile, time
+
+import colorama
+
+try:
+    from ._file_IO import ProprietaryJSON, COMPRESSIONS, EXPORTERS, export_library, parse_karaoke_file
+    from ._shared_store import SharedTimelineStore
+    from .player import Player
+except ImportError:
+    from _file_IO import ProprietaryJSON, COMPRESSIONS, EXPORTERS, export_library, parse_karaoke_file
+    from _shared_store import SharedTimelineStore
+    from player import Player
+
+def make_karaoke_data(line_count: int = 60, seed: int = 0) -> dict:
+    """
+    Make the data of a made up ProprietaryJSON karaoke file.
+    :param line_count: The amount of lines in the karaoke.
+    :param seed: The seed of the random generator, so the same karaoke can be made again.
+    :return: The data that can be saved with json.dump.
+    """
+    generator = random.Random(seed)
+    words = ["love ", "ba", "by ", "to", "night ", "hea", "ven ", "dan", "cing ", "in ", "the ", "rain ", "for", "ev", "er ", "yeah "]
+    karaoke = []
+    line_start = 5.0
+    for _ in range(line_count):
+        syllables = [generator.choice(words) for _ in range(generator.randint(4, 12))]
+        start_times = []
+        syllable_time = 0.0
+        for _ in syllables:
+            start_times.append(round(syllable_time, 3))
+            syllable_time += generator.uniform(0.1, 0.6)
+        karaoke.append({"syllables": syllables, "line_start": round(line_start, 3), "start_times": start_times, "end_time": round(syllable_time, 3)})
+        line_start += syllable_time + generator.uniform(0.2, 2)
+    return {"metadata": {"title": f"Song {seed}", "author": "Benchmark"}, "karaoke": karaoke}
+
+def make_library(folder: str, song_count: int = 200, line_count: int = 60, compression: str = None) -> list[str]:
+    """
+    Save made up karaoke files (see make_karaoke_data) into a folder.
+    :param folder: The folder.
+    :param song_count: The amount of files.
+    :param line_count: The amount of lines in each karaoke.
+    :param compression: A key of _file_IO.COMPRESSIONS, or None to save plain .json files.
+    :return: The paths of the files.
+    """
+    paths = []
+    for seed in range(song_count):
+        raw = json.dumps(make_karaoke_data(line_count, seed), indent=4).encode("utf-8")
+        path = os.path.join(folder, f"song_{seed}.json")
+        if compression is None:
+            with open(path, "wb") as writer:
+                writer.write(raw)
+        else:
+            path += COMPRESSIONS[compression][1]
+            with COMPRESSIONS[compression][2](path, "wb") as writer:
+                writer.write(raw)
+        paths.append(path)
+    return paths
+
+def benchmark_compression(song_count: int = 200, line_count: int = 60) -> None:
+    """
+    Compare the library size and the load time of ProprietaryJSON files with each compression.
+    :param song_count: The amount of files in the library.
+    :param line_count: The amount of lines in each karaoke.
+    :return: None
+    """
+    print(f"compression: {song_count} songs, {line_count} lines each")
+    folder = tempfile.mkdtemp()
+    try:
+        for compression in [None] + list(COMPRESSIONS):
+            library_folder = os.path.join(folder, compression or "plain")
+            os.makedirs(library_folder)
+            paths = make_library(library_folder, song_count, line_count, compression)
+            size = sum(os.path.getsize(path) for path in paths)
+            start = time.perf_counter()
+            for path in paths:
+                ProprietaryJSON(path)
+            elapsed = time.perf_counter() - start
+            print(f"\t{compression or 'plain':<6} {size / 1e6:8.2f} MB {elapsed * 1000:9.1f} ms {song_count / elapsed:9.1f} files/s")
+    finally:
+        shutil.rmtree(folder)
+
+def make_player(line_count: int = 60) -> Player:
+    """
+    Make a Player for a made up karaoke (see make_karaoke_data).
+    :param line_count: The amount of lines in the karaoke.
+    :return: The Player.
+    """
+    folder = tempfile.mkdtemp()
+    try:
+        path = make_library(folder, 1, line_count)[0]
+        parser = ProprietaryJSON(path)
+    finally:
+        shutil.rmtree(folder)
+    return Player(parser.metadata, parser.karaoke)
+
+def benchmark_frame_output(frame_count: int = 5000) -> None:
+    """
+    Compare writing frames through the real, unwrapped sys.stdout (the POSIX terminal path, colorama isn't initialized there)
+    with writing them through colorama's stripping wrapper (what colorama.init() makes when stdout isn't a terminal).
+    The file descriptor of stdout is pointed to os.devnull meanwhile, so only the cost of the write path is measured, not the terminal's.
+    :param frame_count: The amount of frames to write with each path.
+    :return: None
+    """
+    player = make_player()
+    frames = [player.compose_frame(elapsed_time) for elapsed_time in range(frame_count)]
+    print(f"frame_output: {frame_count} frames, {sum(map(len, frames)) / frame_count:.0f} characters each")
+    stdout = sys.__stdout__  # not wrapped, even if colorama was initialized
+    paths = {
+        "sys.stdout": stdout,
+        "colorama (stripping)": colorama.AnsiToWin32(stdout, convert=False, strip=True).stream,
+    }
+    results = {}
+    stdout.flush()
+    saved_file_descriptor = os.dup(stdout.fileno())
+    null_file_descriptor = os.open(os.devnull, os.O_WRONLY)
+    try:
+        os.dup2(null_file_descriptor, stdout.fileno())
+        for name, stream in paths.items():
+            start = time.perf_counter()
+            for frame in frames:
+                stream.write(frame)
+                stream.flush()
+            results[name] = time.perf_counter() - start
+    finally:
+        stdout.flush()
+        os.dup2(saved_file_descriptor, stdout.fileno())
+        os.close(saved_file_descriptor)
+        os.close(null_file_descriptor)
+    for name, elapsed in results.items():
+        print(f"\t{name:<24} {elapsed / frame_count * 1e6:8.1f} us/frame")
+
+def benchmark_export(song_count: int = 1000, line_count: int = 60) -> None:
+    """
+    Measure the throughput of exporting a library to every export format, with one process and with all CPUs.
+    :param song_count: The amount of files in the library.
+    :param line_count: The amount of lines in each karaoke.
+    :return: None
+    """
+    print(f"export: {song_count} songs, {line_count} lines each, {os.cpu_count()} CPUs")
+    folder = tempfile.mkdtemp()
+    try:
+        library_folder = os.path.join(folder, "library")
+        os.makedirs(library_folder)
+        paths = make_library(library_folder, song_count, line_count)
+        size = sum(os.path.getsize(path) for path in paths)
+        for export_format in EXPORTERS:
+            for processes in (1, None):
+                start = time.perf_counter()
+                export_library(paths, export_format, os.path.join(folder, export_format), processes)
+                elapsed = time.perf_counter() - start
+                print(f"\t{export_format:<13} {processes or 'all':>3} processes {song_count / elapsed:9.1f} files/s {size / 1e6 / elapsed:7.1f} MB/s")
+    finally:
+        shutil.rmtree(folder)
+
+def benchmark_import(song_count: int = 500, line_count: int = 60) -> None:
+    """
+    Compare the parse throughput of the importable file formats with the JSON path.
+    The library is made in JSON and exported to the other formats, so every format has the same content.
+    :param song_count: The amount of files in the library.
+    :param line_count: The amount of lines in each karaoke.
+    :return: None
+    """
+    print(f"import: {song_count} songs, {line_count} lines each")
+    folder = tempfile.mkdtemp()
+    try:
+        library_folder = os.path.join(folder, "json")
+        os.makedirs(library_folder)
+        libraries = {"json": make_library(library_folder, song_count, line_count)}
+        for export_format in ("lrc", "enhanced_lrc", "ass"):
+            libraries[export_format] = export_library(libraries["json"], export_format, os.path.join(folder, export_format), 1)[0]
+        start = time.perf_counter()
+        for path in libraries["json"]:
+            ProprietaryJSON(path)
+        json_elapsed = time.perf_counter() - start
+        print(f"\t{'json (no sniffing)':<20} {song_count / json_elapsed:9.1f} files/s")
+        for name, paths in libraries.items():
+            size = sum(os.path.getsize(path) for path in paths)
+            start = time.perf_counter()
+            for path in paths:
+                parse_karaoke_file(path)
+            elapsed = time.perf_counter() - start
+            print(f"\t{name:<20} {song_count / elapsed:9.1f} files/s {size / 1e6 / elapsed:7.1f} MB/s {json_elapsed / elapsed:6.2f}x json")
+    finally:
+        shutil.rmtree(folder)
+
+def benchmark_lanes(lane_counts: tuple[int, ...] = (1, 2, 4, 8, 16), line_count: int = 600, frame_count: int = 2000) -> None:
+    """
+    Measure the cost of composing a frame with the lines divided between more and more singers (lanes).
+    :param lane_counts: The amounts of lanes to measure.
+    :param line_count: The amount of lines in the karaoke.
+    :param frame_count: The amount of frames to compose for every amount of lanes.
+    :return: None
+    """
+    player = make_player(line_count)
+    end_time = player.get_end_time()
+    print(f"lanes: {line_count} lines, {frame_count} frames")
+    for lane_count in lane_counts:
+        for line_index, line in enumerate(player.karaoke.lines):
+            line.set_singer(f"Singer {line_index % lane_count}")
+        player.refresh_lines(list(range(len(player.karaoke.lines))))
+        start = time.perf_counter()
+        for frame in range(frame_count):
+            player.compose_frame(end_time * frame / frame_count)
+        elapsed = time.perf_counter() - start
+        print(f"\t{lane_count:>3} lanes {elapsed / frame_count * 1e6:8.1f} us/frame")
+
+def benchmark_shared_store(song_count: int = 200, line_count: int = 60) -> None:
+    """
+    Compare parsing a library in every player process with publishing it once in shared memory and attaching to it.
+    :param song_count: The amount of files in the library.
+    :param line_count: The amount of lines in each karaoke.
+    :return: None
+    """
+    print(f"shared_store: {song_count} songs, {line_count} lines each")
+    folder = tempfile.mkdtemp()
+    try:
+        paths = make_library(folder, song_count, line_count)
+        start = time.perf_counter()
+        for path in paths:
+            parse_karaoke_file(path)
+        print(f"\t{'parse':<8} {(time.perf_counter() - start) / song_count * 1e6:9.1f} us/song")
+        with SharedTimelineStore(folder=os.path.join(folder, "store")) as publisher:
+            start = time.perf_counter()
+            for path in paths:
+                publisher.load(path)
+            print(f"\t{'publish':<8} {(time.perf_counter() - start) / song_count * 1e6:9.1f} us/song (parse included)")
+            with SharedTimelineStore(folder=os.path.join(folder, "store")) as client:  # like another process
+                start = time.perf_counter()
+                for path in paths:
+                    client.load(path)
+                print(f"\t{'attach':<8} {(time.perf_counter() - start) / song_count * 1e6:9.1f} us/song")
+    finally:
+        shutil.rmtree(folder)
+
+BENCHMARKS = {
+    "compression": benchmark_compression,
+    "frame_output": benchmark_frame_output,
+    "export": benchmark_export,
+    "import": benchmark_import,
+    "lanes": benchmark_lanes,
+    "shared_store": benchmark_shared_store,
+}
+
+def main(names: list[str] = None) -> None:
+    for name in names or BENCHMARKS:
+        BENCHMARKS[name]()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
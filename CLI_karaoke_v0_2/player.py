@@ -2,130 +2,531 @@
 Karaoke player for (multiple?) karaoke file types.
 """
 
-import time
+import bisect, functools, os, time
+from typing import Callable
 
 import colorama
 
 try:
-    from ._terminal_printer import screen_print, screen_print_add_error, choice_input, path_input, get_terminal_size
-    from ._abstract_karaoke import AbstractKaraoke, AbstractLine
-    from ._file_IO import ProprietaryJSON
+    from ._terminal_printer import screen_print, screen_print_add_error, screen_clear_errors, choice_input, path_input, number_input, get_terminal_size, format_screen, cut_visible, FrameWriter
+    from ._abstract_karaoke import AbstractKaraoke, AbstractLine, TimeTransformedKaraoke
+    from ._file_IO import parse_karaoke_file, is_karaoke_file, _FileFormatParser
+    from ._playlist import Playlist, read_playlist
+    from ._file_watcher import FileWatcher
+    from ._shared_store import SharedTimelineStore
 except ImportError as e:
-    from _terminal_printer import screen_print, screen_print_add_error, choice_input, path_input, get_terminal_size
-    from _abstract_karaoke import AbstractKaraoke, AbstractLine
-    from _file_IO import ProprietaryJSON
+    from _terminal_printer import screen_print, screen_print_add_error, screen_clear_errors, choice_input, path_input, number_input, get_terminal_size, format_screen, cut_visible, FrameWriter
+    from _abstract_karaoke import AbstractKaraoke, AbstractLine, TimeTransformedKaraoke
+    from _file_IO import parse_karaoke_file, is_karaoke_file, _FileFormatParser
+    from _playlist import Playlist, read_playlist
+    from _file_watcher import FileWatcher
+    from _shared_store import SharedTimelineStore
     if e.msg == "attempted relative import with no known parent package":
         screen_print_add_error(f"ImportError: {e}; just ignore this")
 
+class FrameRateGovernor:
+    def __init__(self, min_fps: float = 10, max_fps: float = 120, cpu_budget: float = 0.25, smoothing: float = 0.2):
+        """
+        Decides how long to wait before the next frame, instead of a fixed refresh rate.
+        More frames are drawn when the screen changes quickly (a fast syllable being wiped), fewer during gaps and long notes,
+        and never so many that making the frames would take more than cpu_budget of the time.
+        :param min_fps: The lowest frame rate, used when nothing changes on the screen.
+        :param max_fps: The highest frame rate.
+        :param cpu_budget: The maximum part of the time spent on making and writing frames, between 0 and 1.
+        :param smoothing: How quickly the measured frame cost follows new measurements, between 0 and 1.
+        :var self.frame_cost: The measured cost of a frame in seconds (exponential moving average).
+        """
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        self.cpu_budget = cpu_budget
+        self.smoothing = smoothing
+        self.frame_cost = 0.0
+
+    def record_frame_cost(self, cost: float) -> None:
+        """
+        Measure the cost of a frame.
+        :param cost: The time it took to compose and write the frame, in seconds.
+        :return: None
+        """
+        if self.frame_cost == 0.0:
+            self.frame_cost = cost
+        else:
+            self.frame_cost += self.smoothing * (cost - self.frame_cost)
+
+    def next_interval(self, change_interval: float | None, time_to_next_event: float | None) -> float:
+        """
+        Get the time to wait before the next frame.
+        :param change_interval: How often the screen changes right now in seconds (like the time a wipe takes per character), None if it doesn't change.
+        :param time_to_next_event: The time until the next syllable or line starts or ends, None if there are none.
+            The next frame is never later than that (unless it's sooner than max_fps allows), so the highlighting isn't late.
+        :return: The time to wait in seconds.
+        """
+        interval = 1 / self.min_fps if change_interval is None else change_interval
+        interval = min(max(interval, 1 / self.max_fps), 1 / self.min_fps)
+        interval = max(interval, self.frame_cost / self.cpu_budget)
+        if time_to_next_event is not None and time_to_next_event < interval:
+            interval = max(time_to_next_event, 1 / self.max_fps)
+        return interval
+
 class Player:
-    def __init__(self, metadata: dict, karaoke: AbstractKaraoke):
+    def __init__(self, metadata: dict, karaoke: AbstractKaraoke, progressive_wipe: bool = False, speed: float | int = 1, offset: float | int = 0):
         """
         A player object.
         :param metadata: The metadata
-        :param karaoke: AbstractKaraoke
+        :param karaoke: AbstractKaraoke, it's normalized if it isn't yet (see AbstractKaraoke.normalize).
+        :param progressive_wipe: Fill the currently sung syllable character by character as it is sung, instead of lighting it up all at once.
+        :param speed: The speed (tempo) to play at, like 0.75 for practicing at 75%.
+        :param offset: Delay everything by this many seconds (like the latency of the audio). Negative values make everything earlier.
         """
         self.metadata = metadata
+        if not karaoke.is_normalized():  # like after set_lines, before the lines are prepared, normalizing sorts them
+            karaoke.normalize()
+        if speed != 1 or offset != 0:
+            karaoke = TimeTransformedKaraoke.from_speed(karaoke, speed, offset)  # a view, the karaoke itself isn't copied or changed
         self.karaoke = karaoke
+        self.progressive_wipe = progressive_wipe
         self.all_lines = self.karaoke.get_construct_lines()
         self.all_syllables = [self.karaoke.lines[line_index].syllables for line_index in range(len(self.karaoke.lines))]
         self.color_line_not_playing = colorama.Style.DIM + colorama.Fore.WHITE
         self.color_syllable_played = colorama.Style.DIM + colorama.Fore.YELLOW
         self.color_syllable_playing = colorama.Style.BRIGHT + colorama.Fore.LIGHTYELLOW_EX
         self.color_syllable_will_play = colorama.Style.DIM + colorama.Fore.YELLOW
+        self.color_lane_title = colorama.Style.BRIGHT + colorama.Fore.CYAN
         self.color_reset = colorama.Style.RESET_ALL
-        self._scroll = 0  # The amount of scrolling. Increases in increments of 10.
         self._SCROLL_INCREMENT = 10
+        self._MIN_LANE_WIDTH = 24  # Narrower lanes are stacked instead of side by side.
+        self._LANE_GAP = 2  # The spaces between lanes side by side.
+        self.lanes: list[str | None] = []
+        """The singers in the order they first sing. Every singer has their own lane, None is the lane of the lines without a singer."""
+        self._scrolls: list[int] = []  # The amount of scrolling in every lane. Increases in increments of 10 (or less in short lanes).
+        self._idle_cells_width = None  # The lane width of self._idle_cells, they are made again if it changes.
+        self._prepare_lanes()
+        self.show_errors = False
+        """Show the saved errors (see screen_print_add_error) above the frames, like the errors of reloading in play_watched."""
+        self.frame_writer = None
+        self._change_interval = None
+        """How often the last composed frame's content changes (in seconds), None if it doesn't. See FrameRateGovernor."""
+        self._next_event_time = None
+        """The elapsed time when the next syllable or line after the last composed frame starts or ends."""
 
-    def render_frame(self):
-        terminal_size = get_terminal_size(False)
+    def compose_frame(self, elapsed_time: float | int = None) -> str:
+        """
+        Compose a frame, the whole screen, for the specified or current elapsed time, without printing it.
+        :param elapsed_time: If None, the elapsed time since the start of the karaoke is used.
+        :return: The frame, ready to be printed.
+        """
+        if elapsed_time is None:
+            elapsed_time = self.karaoke.get_elapsed_time()
+        terminal_size = get_terminal_size()
         # I. Get data
         # 1. Get the line, syllable data
-        data = self.karaoke.get_current_lines_syllables_indexes()
+        data = self.karaoke.get_current_lines_syllables_indexes(elapsed_time)
         # II. Parse the data
-        line_indexes = []
-        syllable_indexes = []
-        # 2. Separate line and syllable indexes
+        # 2. The current syllable of every line being played, shared by all lanes
+        current_syllables = dict(data)
+        # 3. Timing of the next change (for FrameRateGovernor)
+        self._change_interval = None
+        line_starts = self.karaoke.times
+        next_line = bisect.bisect_right(line_starts, elapsed_time)  # the lines are sorted by their start
+        self._next_event_time = line_starts[next_line] if next_line < len(line_starts) else None
         for line_index, syllable_index in data:
-            line_indexes.append(line_index)
-            syllable_indexes.append(syllable_index)
+            line_start = line_starts[line_index]
+            line_times = self.karaoke.lines[line_index].times
+            next_event_time = line_start + (line_times[0] if syllable_index is None else line_times[syllable_index + 1])
+            if self._next_event_time is None or next_event_time < self._next_event_time:
+                self._next_event_time = next_event_time
+            if self.progressive_wipe and syllable_index is not None:
+                syllable_length = max(len(self.all_syllables[line_index][syllable_index]), 1)
+                change_interval = (line_times[syllable_index + 1] - line_times[syllable_index]) / syllable_length
+                if self._change_interval is None or change_interval < self._change_interval:
+                    self._change_interval = change_interval
         # III. Form the output
-        # 3. Scroll if required
-        if len(line_indexes) != 0:
-            if max(line_indexes) + 4 - self._scroll > terminal_size[1] - 4:
-                self._scroll += self._SCROLL_INCREMENT
+        visible_line_count = terminal_size[1] - 8  # the title and the spacing takes up the rest
         # 4. Title
-        text = "\n\t\t" + self.metadata["title"] + "\n\n"
-        # 5. Lines
-        """for line_pointer in range(0 + self._scroll, min(len(self.all_lines), terminal_size[1] - 8)):
-            if line_pointer in self._line_pointers:  # This line is being played
-                for i, syllable in enumerate(self.all_syllables[line_pointer]):
-                    if i == self._syllable_pointers[line_pointer]:  # If we're currently printing the played syllable
-                        text += self.color_syllable_playing
-                    elif i < self._syllable_pointers[line_pointer]:  # We already played this syllable
-                        text += self.color_syllable_played
-                    elif i > self._syllable_pointers[line_pointer]:  # Will play this syllable
-                        text += self.color_syllable_will_play
-                    text += syllable
-            if line_pointer not in self._line_pointers:  # This line is not being played
-                text += self.color_line_not_playing + self.all_lines[line_pointer]
-            text += "\n"
-        text += self.color_reset"""
-        for line_index in range(0 + self._scroll, min(len(self.all_lines), terminal_size[1] - 8)):
-            if line_index in line_indexes:  # This line is being played
-                for i, syllable in enumerate(self.all_syllables[line_index]):
-                    #  text += f"{line_index}; {i} - {syllable}"
-                    current_syllable = syllable_indexes[line_indexes.index(line_index)]
-                    if current_syllable is None:
-                        text += self.color_syllable_will_play
-                    elif i == current_syllable:  # If we're currently printing the played syllable
-                        text += self.color_syllable_playing
-                    elif i < current_syllable:  # We already played this syllable
-                        text += self.color_syllable_played
-                    elif i > current_syllable:  # Will play this syllable
-                        text += self.color_syllable_will_play
-                    text += syllable
-            else:
-                text += self.color_line_not_playing + self.all_lines[line_index]
-            text += "\n"
-        text += self.color_reset
-        text += "\ndata variable: " + str(data)
-        text += "\n" + str(line_indexes) + ", " + str(syllable_indexes) + " --- " + str([self.all_lines[line_index] for line_index in line_indexes])
-        screen_print_add_error("This code is currently not working. Please fix it up. The things in section II. may be wrong. See the issue by running with test copy.json.")
-        # IV. print
-        screen_print(text, include_errors=False, clear_errors=False)
-
-    def start(self, refresh_rate: float = 1/120):
+        rows = ["", ("\t\t" + self.metadata["title"])[:terminal_size[0]], ""]
+        # 5. Lanes, every lane only renders its visible lines, cut to its width, and side by side only the lines being played are rendered again,
+        #    so a frame costs about as much as the visible cells on the screen, not the amount of lanes or lines
+        if len(self.lanes) == 1:
+            self._scroll_lane(0, current_syllables, visible_line_count)
+            for line_index in self._visible_lines(0, visible_line_count):
+                rows.append(self._render_line(line_index, current_syllables, elapsed_time, terminal_size[0]))
+        else:
+            lane_width = (terminal_size[0] - self._LANE_GAP * (len(self.lanes) - 1)) // len(self.lanes)
+            if lane_width >= self._MIN_LANE_WIDTH:  # Side by side
+                lane_height = max(visible_line_count - 1, 1)  # the lane title takes a row
+                gap = " " * self._LANE_GAP
+                rows.append(gap.join(self._lane_title(lane, lane_width) for lane in range(len(self.lanes))))
+                if lane_width != self._idle_cells_width:
+                    self._idle_cells = {}
+                    self._idle_cells_width = lane_width
+                idle_cells = self._idle_cells  # most cells don't change between frames, only the lines being played are rendered again
+                lane_rows = []
+                for lane in range(len(self.lanes)):
+                    self._scroll_lane(lane, current_syllables, lane_height, min(4, lane_height // 2))
+                    cells = []
+                    for line_index in self._visible_lines(lane, lane_height):
+                        if line_index in current_syllables:
+                            cells.append(self._fit_cell(line_index, self._render_line(line_index, current_syllables, elapsed_time, lane_width), lane_width))
+                            continue
+                        cell = idle_cells.get(line_index)
+                        if cell is None:
+                            cell = idle_cells[line_index] = self._fit_cell(line_index, self._render_line(line_index, current_syllables, elapsed_time, lane_width), lane_width)
+                        cells.append(cell)
+                    lane_rows.append(cells)
+                empty_cell = " " * lane_width
+                row_count = max(len(cells) for cells in lane_rows)
+                for cells in lane_rows:
+                    cells.extend([empty_cell] * (row_count - len(cells)))  # so the shorter lanes line up
+                rows.extend(gap.join(cells).rstrip() for cells in zip(*lane_rows))
+            else:  # Stacked
+                shown_lanes = list(range(len(self.lanes)))
+                lane_rows = visible_line_count
+                if 2 * len(self.lanes) > visible_line_count:  # every lane needs its title and a line, the lanes being sung are shown first
+                    lane_rows = visible_line_count - 1  # a row tells how many lanes are hidden
+                    singing_lanes = {self._line_lanes[line_index] for line_index in current_syllables}
+                    shown_lanes.sort(key=lambda lane: lane not in singing_lanes)
+                    shown_lanes = sorted(shown_lanes[:max(lane_rows // 2, 1)])
+                lane_height = max(lane_rows // len(shown_lanes) - 1, 1)  # the lane title takes a row
+                for lane in range(len(self.lanes)):
+                    self._scroll_lane(lane, current_syllables, lane_height, min(4, lane_height // 2))  # the hidden ones too, to be ready
+                for lane in shown_lanes:
+                    rows.append(self._lane_title(lane, terminal_size[0]))
+                    visible_lines = self._visible_lines(lane, lane_height)
+                    for line_index in visible_lines:
+                        rows.append(self._render_line(line_index, current_syllables, elapsed_time, terminal_size[0]))
+                    rows.extend([""] * (lane_height - len(visible_lines)))  # so the lanes don't move
+                if len(shown_lanes) < len(self.lanes):
+                    hidden = f"+{len(self.lanes) - len(shown_lanes)} more singers"[:terminal_size[0]]
+                    rows.append(self.color_lane_title + hidden + self.color_reset)
+        text = "\n".join(rows) + "\n" + self.color_reset
+        # IV. format, the rows are already cut to the width of the screen
+        return format_screen(text, query_terminal_size=False, include_errors=self.show_errors, clear_errors=False, cut_lines=False)
+
+    def _prepare_lanes(self) -> None:
+        """
+        Sort the lines into lanes by their singer, set self.lanes.
+        The scrolling of the lanes is kept if the lanes are the same as before.
+        :return: None
+        """
+        lanes = []
+        lane_indexes = {}
+        self._line_lanes = []
+        """The lane of every line."""
+        self._lane_lines = []
+        """The line indexes in every lane."""
+        self._line_positions = []
+        """The position of every line inside its lane."""
+        self._idle_cells = {}
+        """The fitted cells of the lines not being played, by line index, for the lanes side by side. See _idle_cells_width."""
+        for line_index, line in enumerate(self.karaoke.lines):
+            if line.singer not in lane_indexes:
+                lane_indexes[line.singer] = len(lanes)
+                lanes.append(line.singer)
+                self._lane_lines.append([])
+            lane = lane_indexes[line.singer]
+            self._line_lanes.append(lane)
+            self._line_positions.append(len(self._lane_lines[lane]))
+            self._lane_lines[lane].append(line_index)
+        if len(lanes) == 0:
+            lanes.append(None)
+            self._lane_lines.append([])
+        if lanes != self.lanes:
+            self._scrolls = [0] * len(lanes)
+        self.lanes = lanes
+
+    def _scroll_lane(self, lane: int, current_syllables: dict[int, int | None], height: int, margin: int = 4) -> None:
+        """
+        Scroll a lane down if a line being played is near the bottom of it.
+        Scrolls by self._SCROLL_INCREMENT lines, or less if the lane is too short for that.
+        :param lane: The index of the lane.
+        :param current_syllables: The lines being played, see compose_frame.
+        :param height: The amount of lines the lane shows.
+        :param margin: How many lines from the bottom a line being played makes the lane scroll.
+        :return: None
+        """
+        positions = [self._line_positions[line_index] for line_index in current_syllables if self._line_lanes[line_index] == lane]
+        if len(positions) != 0:
+            if max(positions) + margin - self._scrolls[lane] > height:
+                self._scrolls[lane] += min(self._SCROLL_INCREMENT, max(1, height - margin))
+
+    def _visible_lines(self, lane: int, height: int) -> list[int]:
+        """
+        Get the indexes of the lines that are visible in a lane.
+        :param lane: The index of the lane.
+        :param height: The amount of lines the lane shows.
+        :return: The line indexes.
+        """
+        return self._lane_lines[lane][self._scrolls[lane]:self._scrolls[lane] + height]
+
+    def _lane_title(self, lane: int, width: int) -> str:
+        """
+        Get the title of a lane, the name of its singer.
+        :param lane: The index of the lane.
+        :param width: The width of the lane. The title is padded to it.
+        :return: The title with the colors.
+        """
+        singer = self.lanes[lane]
+        title = ("All" if singer is None else singer)[:width]
+        return self.color_lane_title + title + " " * (width - len(title)) + self.color_reset
+
+    def _fit_cell(self, line_index: int, rendered_line: str, width: int) -> str:
+        """
+        Pad a rendered line to the width of a lane, so the lanes side by side stay aligned.
+        :param line_index: The index of the line.
+        :param rendered_line: The line with the colors, already cut to the width, see _render_line.
+        :param width: The width of the lane.
+        :return: The line taking up exactly width columns.
+        """
+        length = len(self.all_lines[line_index])  # the colors don't take up any space
+        return rendered_line + " " * (width - min(length, width))
+
+    def _render_line(self, line_index: int, current_syllables: dict[int, int | None], elapsed_time: float | int, width: int) -> str:
+        """
+        Get a line with the colors of the syllables, cut to a width.
+        :param line_index: The index of the line.
+        :param current_syllables: The lines being played, see compose_frame.
+        :param elapsed_time: The elapsed time since the start of the karaoke.
+        :param width: The maximum visible width of the line.
+        :return: The line with the colors.
+        """
+        if line_index not in current_syllables:
+            return self.color_line_not_playing + self.all_lines[line_index][:width]
+        # This line is being played
+        current_syllable = current_syllables[line_index]
+        text = ""
+        for i, syllable in enumerate(self.all_syllables[line_index]):
+            if current_syllable is None:
+                text += self.color_syllable_will_play
+            elif i == current_syllable:  # If we're currently printing the played syllable
+                if self.progressive_wipe:
+                    text += self._wipe_syllable(line_index, i, elapsed_time)
+                    continue
+                text += self.color_syllable_playing
+            elif i < current_syllable:  # We already played this syllable
+                text += self.color_syllable_played
+            elif i > current_syllable:  # Will play this syllable
+                text += self.color_syllable_will_play
+            text += syllable
+        if len(self.all_lines[line_index]) > width:
+            return cut_visible(text, width)
+        return text
+
+    def _wipe_syllable(self, line_index: int, syllable_index: int, elapsed_time: float | int) -> str:
+        """
+        Get the currently sung syllable, partially lit up in proportion to the time elapsed inside it.
+        :param line_index: The index of the line.
+        :param syllable_index: The index of the syllable in the line.
+        :param elapsed_time: The elapsed time since the start of the karaoke.
+        :return: The syllable with the colors.
+        """
+        syllable = self.all_syllables[line_index][syllable_index]
+        line_times = self.karaoke.lines[line_index].times
+        syllable_start = self.karaoke.times[line_index] + line_times[syllable_index]
+        syllable_duration = line_times[syllable_index + 1] - line_times[syllable_index]
+        if syllable_duration <= 0:
+            lit_length = len(syllable)
+        else:
+            lit_length = min(int(len(syllable) * (elapsed_time - syllable_start) / syllable_duration) + 1, len(syllable))
+        return self.color_syllable_playing + syllable[:lit_length] + self.color_syllable_will_play + syllable[lit_length:]
+
+    def refresh_lines(self, previous_indexes: list[int | None]) -> None:
+        """
+        Update the prepared lines after the lines of the karaoke were changed in place (see ProprietaryJSON.reload).
+        :param previous_indexes: For every line, the index it had before the change, or None if it's new or changed.
+        :return: None
+        """
+        self.all_lines = [
+            self.karaoke.lines[line_index].construct_line() if previous_index is None else self.all_lines[previous_index]
+            for line_index, previous_index in enumerate(previous_indexes)
+        ]
+        self.all_syllables = [line.syllables for line in self.karaoke.lines]
+        self._prepare_lanes()
+
+    def render_frame(self):
+        """
+        Compose the current frame and print it right away.
+        :return: None
+        """
+        print(self.compose_frame(), end="")
+
+    def get_end_time(self) -> float | int:
+        """
+        Get the end of the last syllable of the karaoke.
+        :return: The time relative to the start of the karaoke.
+        """
+        return self.karaoke.duration  # calculated by AbstractKaraoke.normalize, in __init__ at the latest
+
+    def start(self, refresh_rate: float = 1/120, governor: FrameRateGovernor = None, on_frame: Callable[[], bool] = None):
         """
         Start displaying a karaoke.
-        :param refresh_rate: The refresh rate of the screen.
+        Frames are composed in this thread from the clock, and written to the terminal by a FrameWriter in another thread.
+        If the terminal is slow, frames are dropped instead of the lyrics falling behind the music.
+        The frame counters are in self.frame_writer afterwards.
+        :param refresh_rate: The refresh rate of the screen. Not used if there is a governor.
+        :param governor: Decides the time between frames from what's on the screen and how much a frame costs.
+            If None and progressive wipe is on, a FrameRateGovernor is used with refresh_rate as the highest frame rate.
+        :param on_frame: Called before every frame. If it returns True, the karaoke was changed (so the end time is read again).
         :return: None
         """
-        end_time = self.karaoke.lines[-1].times[-1]
+        if governor is None and self.progressive_wipe:
+            governor = FrameRateGovernor(max_fps=1 / refresh_rate)
+        # A Player can be started again (like a song repeated in a playlist), every run starts from the top
+        self._scrolls = [0] * len(self.lanes)
+        self._idle_cells = {}
+        self._change_interval = None
+        self._next_event_time = None
+        end_time = self.get_end_time()
+        self.frame_writer = FrameWriter()
+        self.frame_writer.start()
         self.karaoke.start()
-        while self.karaoke.get_elapsed_time() <= end_time:  # while in time
-            self.render_frame()
-            time.sleep(refresh_rate)
+        next_frame_time = time.perf_counter()
+        try:
+            while True:
+                if on_frame is not None and on_frame():
+                    end_time = self.get_end_time()
+                frame_start = time.perf_counter()
+                elapsed_time = self.karaoke.get_elapsed_time(frame_start)
+                if elapsed_time > end_time:
+                    break
+                self.frame_writer.submit(self.compose_frame(elapsed_time))
+                if governor is None:
+                    next_frame_time += refresh_rate
+                else:
+                    governor.record_frame_cost(time.perf_counter() - frame_start + self.frame_writer.last_write_duration)
+                    time_to_next_event = None if self._next_event_time is None else self._next_event_time - elapsed_time
+                    next_frame_time = frame_start + governor.next_interval(self._change_interval, time_to_next_event)
+                time.sleep(max(0.0, next_frame_time - time.perf_counter()))
+        finally:
+            self.frame_writer.stop()
+
+def load_player(path: str, progressive_wipe: bool = False, speed: float | int = 1, offset: float | int = 0, store: SharedTimelineStore = None) -> Player:
+    """
+    Parse a karaoke file and prepare a Player for it.
+    :param path: The path of the karaoke file in any supported format (see _file_IO.FILE_FORMATS). It may be compressed, see _file_IO.COMPRESSIONS.
+    :param progressive_wipe: See Player.
+    :param speed: See Player.
+    :param offset: See Player.
+    :param store: If not None, the karaoke is taken from this store (shared with other player processes) instead of being parsed here,
+        unless no process published it yet.
+    :return: The Player.
+    """
+    if store is not None:
+        karaoke = store.load(path)
+        return Player(karaoke.metadata, karaoke, progressive_wipe, speed, offset)
+    parser = parse_karaoke_file(path)
+    return Player(parser.metadata, parser.karaoke, progressive_wipe, speed, offset)
+
+def play_watched(path: str, progressive_wipe: bool = False, speed: float | int = 1, offset: float | int = 0, parser: _FileFormatParser = None) -> None:
+    """
+    Play a karaoke file, and apply the changes when the file is saved (like in a text editor) without restarting.
+    Only the changed lines are parsed again, and the karaoke continues from where it was.
+    If the file can't be reloaded (like when it's saved halfway), the error is shown above the lyrics until the next successful reload.
+    :param path: The path of the karaoke file.
+    :param progressive_wipe: See Player.
+    :param speed: See Player.
+    :param offset: See Player.
+    :param parser: The already parsed file (see parse_karaoke_file), if None it's parsed here.
+    :return: None
+    """
+    if parser is None:
+        parser = parse_karaoke_file(path)
+    player = Player(parser.metadata, parser.karaoke, progressive_wipe, speed, offset)
+    player.show_errors = True
+    watcher = FileWatcher(path)
+
+    def apply_changes() -> bool:
+        if not watcher.has_changed():
+            return False
+        try:
+            previous_indexes = parser.reload()
+        except (OSError, ValueError, KeyError, TypeError) as e:  # probably saved halfway, the next save will fix it
+            screen_clear_errors()  # only the error of the last save
+            screen_print_add_error(f"Couldn't reload {path}: {e}")
+            return False
+        screen_clear_errors()
+        player.refresh_lines(previous_indexes)
+        return True
+
+    try:
+        player.start(on_frame=apply_changes)
+    finally:
+        watcher.close()
+
+def play_playlist(paths: list[str], progressive_wipe: bool = False, speed: float | int = 1, offset: float | int = 0, prefetch: int = 2, cache_size: int = 4, store: SharedTimelineStore = None) -> None:
+    """
+    Play karaoke files after each other. The next songs are prepared while the current one is playing.
+    :param paths: The paths of the karaoke files.
+    :param progressive_wipe: See Player.
+    :param speed: See Player.
+    :param offset: See Player.
+    :param prefetch: How many songs are prepared in advance.
+    :param cache_size: How many prepared songs are kept in memory at most.
+    :param store: See load_player. The songs dropped from the memory of the playlist are released from the store too.
+    :return: None
+    """
+
+    def release(path: str, player: Player) -> None:
+        karaoke = player.karaoke
+        if isinstance(karaoke, TimeTransformedKaraoke):
+            karaoke = karaoke.karaoke  # views of views are combined into one, see TimeTransformedKaraoke
+        store.release(karaoke.key)
+
+    playlist = Playlist(paths, functools.partial(load_player, progressive_wipe=progressive_wipe, speed=speed, offset=offset, store=store), prefetch, cache_size, None if store is None else release)
+    try:
+        for index, path in enumerate(playlist.paths):
+            if index != 0:
+                input(f"\tPress Enter to start the next song ({path}). ")
+            try:
+                player = playlist.get(index)
+            except (OSError, ValueError, KeyError) as e:
+                screen_print_add_error(f"Couldn't load {path}: {e}")
+                continue
+            player.start()
+    finally:
+        playlist.close()
 
 def main():
-    screen_print(
+    welcome_text = (
 """
     Welcome to the CLI karaoke player!
     
     Please enter the name of the file you want to play.
     Use one of the following file formats:
         - .json (a proprietary way of using JSON to store karaoke information, see the _file_IO.py module)
+        - .lrc (simple or enhanced with times for words or syllables)
+        - .ass (subtitles with \\k karaoke tags)
+    Files compressed with gzip, bz2 or xz (like .json.gz, .json.bz2, .json.xz) work too.
+    You can also enter a folder or a playlist (a text file with one path per line) to play multiple files.
     
     Please note that this program doesn't play music, you need to sync that yourself.
-    Before the karaoke starts, it will have a 5 second countdown so you can sync the music with the karaoke text.""",
-        input_space=True
+    Before the karaoke starts, it will have a 5 second countdown so you can sync the music with the karaoke text."""
     )
-    path = path_input("\tPath: ", "{} is an invalid/nonexistent path. Please enter the path to the karaoke file.")
-    if path.endswith(".json"):
-        parser = ProprietaryJSON(path)
-        karaoke = parser.karaoke
-        metadata = parser.metadata
-    player = Player(metadata, karaoke)
-    player.start()
+    screen_print(welcome_text, input_space=True)
+    while True:
+        path = path_input("\tPath: ", "{} is an invalid/nonexistent path. Please enter the path to the karaoke file.")
+        if os.path.isdir(path) or path.endswith(".txt"):  # a playlist, the files are loaded one by one while playing
+            parser = None
+            break
+        try:
+            parser = parse_karaoke_file(path)
+            break
+        except (OSError, ValueError, KeyError, TypeError) as e:  # unsupported, corrupt or not text at all
+            screen_print_add_error(f"Couldn't load {path}: {e}")
+            screen_print(welcome_text, input_space=True)
+    progressive_wipe = choice_input(["Y", "N"], "\tFill the syllables character by character as they are sung? Y / N: ") == "Y"
+    speed = number_input("\tSpeed in percent, for practicing slower (Enter for 100): ", 100, minimum=1) / 100
+    offset = number_input("\tDelay in seconds, for the latency of the audio (Enter for 0): ", 0)
+    if os.path.isdir(path) or path.endswith(".txt"):
+        if choice_input(["Y", "N"], "\tShare the loaded songs with the other players on this computer? Y / N: ") == "Y":
+            with SharedTimelineStore() as store:
+                play_playlist(read_playlist(path, is_karaoke_file), progressive_wipe, speed, offset, store=store)
+        else:
+            play_playlist(read_playlist(path, is_karaoke_file), progressive_wipe, speed, offset)
+    elif choice_input(["Y", "N"], "\tReload the file when it's saved (for checking the timing while writing)? Y / N: ") == "Y":
+        play_watched(path, progressive_wipe, speed, offset, parser)
+    else:
+        player = Player(parser.metadata, parser.karaoke, progressive_wipe, speed, offset)
+        player.start()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,8 +2,118 @@
 Karaoke writer for (multiple?) karaoke file types.
 """
 
+import json, os
+
+try:
+    from ._terminal_printer import screen_print, screen_print_add_error, choice_input, path_input
+    from ._syllabifier import Syllabifier
+    from ._file_IO import parse_karaoke_file, is_karaoke_file, EXPORTERS, export_file, export_library, strip_compression_extension
+    from ._playlist import read_playlist
+except ImportError as e:
+    from _terminal_printer import screen_print, screen_print_add_error, choice_input, path_input
+    from _syllabifier import Syllabifier
+    from _file_IO import parse_karaoke_file, is_karaoke_file, EXPORTERS, export_file, export_library, strip_compression_extension
+    from _playlist import read_playlist
+    if e.msg == "attempted relative import with no known parent package":
+        screen_print_add_error(f"ImportError: {e}; just ignore this")
+
+def create_karaoke_skeleton(lyrics: str, title: str, author: str, syllabifier: Syllabifier = None) -> dict:
+    """
+    Create the data of a ProprietaryJSON karaoke file from plain lyrics. The lines are automatically split into syllables.
+    All timings are 0, they have to be filled in afterwards.
+    :param lyrics: The lyrics, lines separated by line breaks. Empty lines are skipped.
+    :param title: The title of the song.
+    :param author: The author of the song.
+    :param syllabifier: The Syllabifier to split the lines with. If None, a new English one is used.
+    :return: The data that can be saved with json.dump.
+    """
+    if syllabifier is None:
+        syllabifier = Syllabifier()
+    karaoke = []
+    for syllables in syllabifier.syllabify_lyrics(lyrics):
+        karaoke.append({
+            "syllables": syllables,
+            "line_start": 0,
+            "start_times": [0] * len(syllables),
+            "end_time": 0
+        })
+    return {"metadata": {"title": title, "author": author}, "karaoke": karaoke}
+
+def create_from_lyrics():
+    screen_print(
+"""
+    Please enter the name of a text file with the lyrics of the song, one line of lyrics per line.
+    The lines will be automatically split into syllables (English only for now), and saved
+    as a .json karaoke file (see the _file_IO.py module). You have to add the timings yourself.""",
+        input_space=True
+    )
+    lyrics_path = path_input("\tLyrics path: ", "{} is an invalid/nonexistent path. Please enter the path to the lyrics file.")
+    with open(lyrics_path, "r", encoding="utf-8") as reader:
+        lyrics = reader.read()
+    title = input("\tTitle: ")
+    author = input("\tAuthor: ")
+    data = create_karaoke_skeleton(lyrics, title, author)
+    preview = "\n".join("\t" + "|".join(line["syllables"]) for line in data["karaoke"])
+    screen_print("\n\tThe syllables:\n\n" + preview, input_space=True)
+    if choice_input(["Y", "N"], "\tSave the karaoke file? Y / N: ") == "Y":
+        save_path = input("\tSave as: ")
+        if not save_path.endswith(".json"):
+            save_path += ".json"
+        with open(save_path, "w", encoding="utf-8") as writer:
+            json.dump(data, writer, ensure_ascii=False, indent=4)
+        screen_print(f"\n\tSaved to {save_path}.", input_space=True)
+
+def export():
+    screen_print(
+"""
+    Please enter the name of the karaoke file you want to export,
+    or a folder or a playlist (a text file with one path per line) to export all of them.
+
+    Export formats:
+        """ + ", ".join(EXPORTERS),
+        input_space=True
+    )
+    path = path_input("\tPath: ", "{} is an invalid/nonexistent path. Please enter the path to the karaoke file.")
+    export_format = choice_input(list(EXPORTERS), "\tFormat: ", "There is no format {}. Please enter another one.")
+    if os.path.isdir(path) or path.endswith(".txt"):
+        output_folder = input("\tOutput folder: ")
+        try:
+            exported, failed = export_library(read_playlist(path, is_karaoke_file), export_format, output_folder)
+        except OSError as e:  # like an output folder that can't be made
+            screen_print_add_error(f"Couldn't export to {output_folder}: {e}")
+            screen_print("", input_space=True)
+            return
+        for failed_path, e in failed.items():
+            screen_print_add_error(f"Couldn't export {failed_path}: {e}")
+        screen_print(f"\n\tExported {len(exported)} files to {output_folder}, {len(failed)} failed.", input_space=True)
+    else:
+        output_path = os.path.splitext(strip_compression_extension(path))[0] + EXPORTERS[export_format][0]
+        if os.path.abspath(output_path) == os.path.abspath(path):  # don't overwrite the original
+            output_path = os.path.splitext(output_path)[0] + "_exported" + EXPORTERS[export_format][0]
+        try:
+            parser = parse_karaoke_file(path)
+            export_file(parser.karaoke, parser.metadata, export_format, output_path)
+        except (OSError, ValueError, KeyError, TypeError) as e:  # unsupported, corrupt or not text at all
+            screen_print_add_error(f"Couldn't export {path}: {e}")
+            screen_print("", input_space=True)
+            return
+        screen_print(f"\n\tExported to {output_path}.", input_space=True)
+
 def main():
-    pass
+    screen_print(
+"""
+    Welcome to the CLI karaoke writer!
+    Please choose from the following options:
+
+        A Create a karaoke file from lyrics
+        B Export karaoke files to other formats (LRC, SRT, ASS)""",
+        input_space=True
+    )
+    choice = choice_input(["A", "B"], "\tEnter a letter, A or B: ", "There is no choice {}. Please enter another letter.")
+    if choice == "A":
+        create_from_lyrics()
+    elif choice == "B":
+        export()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()